@@ -4,6 +4,7 @@ from pathlib import Path
 import pandas as pd
 from tqdm import tqdm
 
+import tracking.ball
 import tracking.features
 import tracking.process
 import tracking.read
@@ -38,11 +39,21 @@ print(f"Found {len(matches)} matches")
 
 
 for match_id in tqdm(matches):
-    tracking_df = tracking.read.read_by_match_id(match_id)
-    tracking_df = tracking.process.process(tracking_df, actions, match_id)
+    tracking_df, ball = tracking.read.read_by_match_id(match_id, with_ball=True)
 
     ids = gamestates[gamestates["match_id"] == match_id]["event_id"].tolist()
 
+    # Voo real de cada cruzamento a partir do frame marcado no tracking, com
+    # a bola padronizada pelo mesmo lado do campo que o process usa
+    cross_frames = tracking_df[tracking_df["possession_event_id"].isin(ids)].groupby("possession_event_id")["frame_num"].min()
+    cross_actions = actions.drop_duplicates("event_id").set_index("event_id").reindex(cross_frames.index.astype("int64")).reset_index()
+    flips = tracking.ball.cross_flips(tracking_df, cross_actions)
+    # Chegada pelo frame do evento seguinte quando ele vem dentro do voo
+    end_frames = tracking.ball.next_event_frames(tracking_df, cross_frames.to_numpy())
+    flights = tracking.ball.cross_flights(ball, cross_frames.to_numpy(), end_frames=end_frames, ids=cross_frames.index.astype("int64"), flips=flips)
+
+    tracking_df = tracking.process.process(tracking_df, actions, match_id)
+
     for id in ids:
         frame = tracking_df[tracking_df["possession_event_id"] == id]
 
@@ -59,10 +70,20 @@ for match_id in tqdm(matches):
 
         event = gamestates[gamestates["event_id"] == id].iloc[0]
 
-        attackers, defenders = tracking.features.count_players_in_zone(frame, event)
+        time_to_target = flights["flight_time"].get(id, None)
+
+        attackers, defenders = tracking.features.count_players_in_zone(frame, event, time_to_target)
 
         gamestates.loc[gamestates["event_id"] == id, "attackers_in_zone" ] = attackers
         gamestates.loc[gamestates["event_id"] == id, "defenders_in_zone"] = defenders
+        gamestates.loc[gamestates["event_id"] == id, "flight_time"] = time_to_target
+
+    # Pitch control de todos os cruzamentos da partida em lote
+    match_mask = gamestates["match_id"] == match_id
+    pc_features = tracking.features.pitch_control_features(tracking_df, gamestates[match_mask])
+
+    for col in pc_features.columns:
+        gamestates.loc[match_mask, col] = gamestates.loc[match_mask, "event_id"].astype("int64").map(pc_features[col]).to_numpy()
 
     gamestates.to_parquet("./data/gamestates.parquet")
 
@@ -0,0 +1,325 @@
+import numpy as np
+import pandas as pd
+
+FRAME_RATE = 25
+
+# Frames seguidos depois do cruzamento procurando a chegada (4s a 25 fps)
+MAX_FLIGHT_FRAMES = 100
+
+# Primeiros frames depois do cruzamento ignorados na detecção (o próprio chute)
+MIN_FLIGHT_FRAMES = 3
+
+# Janela (frames) da média móvel centrada da bola antes de derivar, como o
+# _calculate_smoothed_velocity do tracking.process faz com os jogadores
+SMOOTHING_FRAMES = 5
+
+# Buracos (frames sem bola) interpolados antes da suavização
+MAX_GAP_FRAMES = 3
+
+# Frames de cada lado usados na velocidade média antes e depois de um frame:
+# um toque muda a velocidade de toda a janela seguinte, o ruído de um frame não
+TOUCH_WINDOW_FRAMES = 5
+
+# Frames seguidos com a mudança acima do limite para contar como toque
+TOUCH_SUSTAIN_FRAMES = 3
+
+# Mudança (m/s) entre a velocidade média antes e depois de um frame que
+# indica um toque ou quique, já descontada a gravidade com a bola no ar
+TOUCH_THRESHOLD = 4.0
+
+# Altura (m) acima da qual a bola está no ar e cai com a gravidade
+AIRBORNE_HEIGHT = 0.3
+
+GRAVITY = 9.81
+
+
+def ball_track(tracking_df: pd.DataFrame) -> dict:
+    """
+    Trajetória da bola de uma partida em arrays indexados pelo frame: a
+    posição do frame f fica na linha f - first_frame, então achar o frame de
+    qualquer evento é O(1)
+
+    Args:
+        tracking_df (pd.DataFrame): Linhas da bola (frame_num, x, y e, se
+            existir, z), já renomeadas como no read_by_match_id
+
+    Returns:
+        dict: 'first_frame' (int) e 'xyz' float32 (frames, 3), com NaN nos
+              frames sem bola e na altura se o tracking não tiver z
+    """
+    frames = tracking_df["frame_num"].to_numpy(dtype=np.int64)
+    if len(frames) == 0:
+        return {'first_frame': 0, 'xyz': np.empty((0, 3), dtype=np.float32)}
+
+    first_frame = int(frames.min())
+    xyz = np.full((int(frames.max()) - first_frame + 1, 3), np.nan, dtype=np.float32)
+
+    rows = frames - first_frame
+    xyz[rows, 0] = tracking_df["x"].to_numpy(dtype=np.float32)
+    xyz[rows, 1] = tracking_df["y"].to_numpy(dtype=np.float32)
+    if "z" in tracking_df.columns:
+        xyz[rows, 2] = tracking_df["z"].to_numpy(dtype=np.float32)
+
+    return {'first_frame': first_frame, 'xyz': xyz}
+
+
+def ball_positions(track: dict, frames) -> np.ndarray:
+    """
+    Posição da bola em cada frame (qualquer formato de array), NaN fora da
+    trajetória
+
+    Returns:
+        np.ndarray: float32 com formato frames.shape + (3,)
+    """
+    frames = np.asarray(frames, dtype=np.int64)
+    if len(track['xyz']) == 0:
+        return np.full(frames.shape + (3,), np.nan, dtype=np.float32)
+
+    rows = frames - track['first_frame']
+    inside = (rows >= 0) & (rows < len(track['xyz']))
+
+    positions = track['xyz'][np.where(inside, rows, 0)]
+    positions[~inside] = np.nan
+
+    return positions
+
+
+def cross_flips(tracking_df: pd.DataFrame, crosses: pd.DataFrame, event_column="possession_event_id") -> np.ndarray:
+    """
+    Sinais (x, y) que padronizam cada cruzamento como no
+    _standardize_crossings_direction do tracking.process: -1 onde o cruzador
+    está em x < 0 (ou y < 0) no primeiro frame do cruzamento
+
+    Args:
+        tracking_df (pd.DataFrame): Tracking bruto (antes do process)
+        crosses (pd.DataFrame): Cruzamentos (event_id, team_id, player_jersey_num)
+        event_column (str): Coluna do tracking com o id do evento
+
+    Returns:
+        np.ndarray: (n, 2) com +1/-1 na ordem de crosses (+1 se o cruzador
+                    não for achado, como no process)
+    """
+    frames = tracking_df[tracking_df[event_column].isin(crosses["event_id"].tolist())]
+    frames = frames[frames["frame_num"] == frames.groupby(event_column)["frame_num"].transform("min")]
+
+    crosser = pd.DataFrame({
+        'event_id': frames[event_column].to_numpy(dtype=float),
+        'team_id': frames["team_id"].to_numpy(dtype=float),
+        'jersey': frames["jersey_number"].to_numpy(dtype=float),
+        'x': frames["x"].to_numpy(dtype=float),
+        'y': frames["y"].to_numpy(dtype=float),
+    }).merge(pd.DataFrame({
+        'event_id': crosses["event_id"].to_numpy(dtype=float),
+        'team_id': crosses["team_id"].to_numpy(dtype=float),
+        'jersey': crosses["player_jersey_num"].to_numpy(dtype=float),
+    }), on=['event_id', 'team_id', 'jersey'])
+
+    crosser = crosser.drop_duplicates('event_id').set_index('event_id')
+    signs = np.where(crosser[['x', 'y']].to_numpy() < 0, -1.0, 1.0)
+    signs = pd.DataFrame(signs, index=crosser.index).reindex(crosses["event_id"].to_numpy(dtype=float))
+
+    return signs.fillna(1.0).to_numpy()
+
+
+def next_event_frames(tracking_df: pd.DataFrame, cross_frames, event_column="possession_event_id") -> np.ndarray:
+    """
+    Primeiro frame do evento marcado logo depois de cada cruzamento (o toque
+    seguinte na bola), para usar como end_frames em cross_flights
+
+    Args:
+        tracking_df (pd.DataFrame): Tracking com frame_num e a coluna do evento
+        cross_frames (np.ndarray): Frame de cada cruzamento
+        event_column (str): Coluna do tracking com o id do evento
+
+    Returns:
+        np.ndarray: Frame do evento seguinte, -1 se não houver
+    """
+    event_frames = np.sort(tracking_df.groupby(event_column)["frame_num"].min().to_numpy(dtype=np.int64))
+    cross_frames = np.asarray(cross_frames, dtype=np.int64)
+
+    following = np.searchsorted(event_frames, cross_frames, side="right")
+    return np.where(following < len(event_frames), event_frames[np.minimum(following, len(event_frames) - 1)], -1)
+
+
+def _smooth_track(positions: np.ndarray, size: int, max_gap: int) -> np.ndarray:
+    """
+    Média móvel centrada no eixo dos frames (axis=1) de todas as linhas de
+    uma vez. Buracos de até max_gap frames são interpolados antes; onde a
+    janela não fica completa (fim dos dados, buracos longos) o resultado é
+    NaN, já que uma janela cortada atrasa a média e parece um toque
+    """
+    filled = np.stack([
+        pd.DataFrame(positions[..., d]).interpolate(axis=1, limit=max_gap, limit_area="inside").to_numpy()
+        for d in range(positions.shape[-1])
+    ], axis=-1)
+
+    pad = size // 2
+    padded = np.pad(filled, ((0, 0), (pad, size - 1 - pad), (0, 0)), constant_values=np.nan)
+    return np.lib.stride_tricks.sliding_window_view(padded, size, axis=1).mean(axis=-1)
+
+
+def cross_flights(track: dict, cross_frames, end_frames=None, ids=None, flips=None, max_frames=MAX_FLIGHT_FRAMES,
+                  min_frames=MIN_FLIGHT_FRAMES, touch_threshold=TOUCH_THRESHOLD, fps=FRAME_RATE) -> pd.DataFrame:
+    """
+    Voo de cada cruzamento medido na trajetória da bola, para todos os
+    cruzamentos de uma vez: os max_frames frames seguintes de cada um viram
+    uma matriz (cruzamentos x frames), suavizada antes de derivar. A chegada
+    é o frame em que a velocidade média da janela seguinte difere da janela
+    anterior em mais que touch_threshold (alguém tocou na bola ou ela
+    quicou) por TOUCH_SUSTAIN_FRAMES frames seguidos, no pico dessa mudança
+
+    Args:
+        track (dict): Saída de ball_track
+        cross_frames (np.ndarray): Frame de cada cruzamento
+        end_frames (np.ndarray): Frame de chegada já conhecido (ex: frame do
+            evento seguinte, ver next_event_frames); onde for válido
+            substitui a detecção
+        ids (list): Índice do resultado (ex: event_id); posição se None
+        flips (np.ndarray): Sinais (n, 2) de x e y de cada cruzamento (ver
+            cross_flips), para as posições saírem padronizadas como o
+            tracking do process; sem flips ficam nas coordenadas brutas
+        max_frames (int): Frames procurados depois do cruzamento
+        min_frames (int): Frames iniciais ignorados na detecção
+        touch_threshold (float): Mudança de velocidade (m/s) de um toque
+        fps (int): Frames por segundo do tracking
+
+    Returns:
+        pd.DataFrame: arrival_frame (-1 se não achou), flight_time (s),
+                      apex_z (m), apex_frame, arrival_x e arrival_y
+                      (padronizados se flips for passado)
+    """
+    cross_frames = np.asarray(cross_frames, dtype=np.int64)
+    window = TOUCH_WINDOW_FRAMES
+    # Frames extras no fim para a janela depois do último frame procurado
+    offsets = np.arange(max_frames + window + 1)
+
+    # (cruzamentos, frames, 3) a partir do frame do cruzamento
+    positions = ball_positions(track, cross_frames[:, None] + offsets).astype(float)
+    if flips is not None:
+        positions[..., :2] *= np.asarray(flips, dtype=float)[:, None, :]
+
+    # Sem z a variação é só no plano
+    dims = 3 if not np.isnan(positions[..., 2]).all() else 2
+    smooth = _smooth_track(positions[..., :dims], SMOOTHING_FRAMES, MAX_GAP_FRAMES)
+
+    # Velocidade média na janela antes e depois de cada frame candidato
+    candidates = np.arange(window, max_frames + 1)
+    before = (smooth[:, candidates] - smooth[:, candidates - window]) * fps / window
+    after = (smooth[:, candidates + window] - smooth[:, candidates]) * fps / window
+    if dims == 3:
+        # No ar a bola perde g * t de velocidade vertical sem ninguém tocar
+        airborne = smooth[:, candidates, 2] > AIRBORNE_HEIGHT
+        after[..., 2] += np.where(airborne, GRAVITY * window / fps, 0.0)
+
+    # Frames sem bola (NaN) nunca contam como toque
+    change = np.nan_to_num(np.linalg.norm(after - before, axis=2), nan=0.0)
+    above = change >= touch_threshold
+    above[:, candidates < min_frames] = False
+
+    # Só uma mudança que se mantém por TOUCH_SUSTAIN_FRAMES frames é toque
+    sustained = np.lib.stride_tricks.sliding_window_view(above, TOUCH_SUSTAIN_FRAMES, axis=1).all(axis=-1)
+    found = sustained.any(axis=1)
+    first = sustained.argmax(axis=1)
+
+    # A mudança cresce até o frame do toque e depois cai: a chegada é o pico
+    search = np.minimum(first[:, None] + np.arange(window + TOUCH_SUSTAIN_FRAMES), len(candidates) - 1)
+    peak = first + np.take_along_axis(change, search, axis=1).argmax(axis=1)
+    arrival = np.where(found, candidates[peak], -1)
+
+    if end_frames is not None:
+        known = np.asarray(end_frames, dtype=np.int64) - cross_frames
+        known_valid = (known > 0) & (known <= max_frames)
+        arrival = np.where(known_valid, known, arrival)
+        found = found | known_valid
+
+    # Ápice só dentro do voo
+    z = np.where(offsets <= arrival[:, None], positions[..., 2], np.nan)
+    has_z = found & ~np.isnan(z).all(axis=1)
+    apex = np.where(has_z, np.argmax(np.where(np.isnan(z), -np.inf, z), axis=1), -1)
+
+    rows = np.arange(len(cross_frames))
+    arrival_position = positions[rows, np.maximum(arrival, 0)]
+
+    return pd.DataFrame({
+        'arrival_frame': np.where(found, cross_frames + arrival, -1),
+        'flight_time': np.where(found, arrival / fps, np.nan),
+        'apex_z': np.where(has_z, z[rows, np.maximum(apex, 0)], np.nan),
+        'apex_frame': np.where(has_z, cross_frames + apex, -1),
+        'arrival_x': np.where(found, arrival_position[:, 0], np.nan),
+        'arrival_y': np.where(found, arrival_position[:, 1], np.nan),
+    }, index=ids)
+
+
+def _synthetic_flights(n, arrival, noise, fps=FRAME_RATE, seed=42):
+    """
+    Trajetórias de cruzamentos parabólicos que chegam num cabeceio em
+    arrival frames (a bola volta para trás), com ruído gaussiano de desvio
+    noise (m) em cada coordenada
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(MAX_FLIGHT_FRAMES + TOUCH_WINDOW_FRAMES + 1) / fps
+    t_arrival = arrival / fps
+
+    vx = rng.uniform(15, 25, (n, 1))
+    vy = rng.uniform(-5, 5, (n, 1))
+    # Velocidade vertical para a bola chegar a ~2m de altura no cabeceio
+    vz = (2.0 + GRAVITY * t_arrival ** 2 / 2) / t_arrival
+    in_flight = t <= t_arrival
+
+    x = np.where(in_flight, vx * t, vx * t_arrival - 0.5 * vx * (t - t_arrival))
+    y = np.where(in_flight, vy * t, vy * t_arrival)
+    z = np.where(in_flight, vz * t - GRAVITY * t ** 2 / 2, np.maximum(2.0 - 5.0 * (t - t_arrival), 0.0))
+
+    xyz = np.stack([x, y, np.broadcast_to(z, x.shape)], axis=-1)
+    return xyz + rng.normal(0.0, noise, xyz.shape)
+
+
+def check_arrival_detection(noises=(0.0, 0.02, 0.05, 0.1), n_trials=200, arrival=30, tolerance=2, seed=42) -> pd.DataFrame:
+    """
+    Confere a detecção da chegada em voos sintéticos com ruído: cada voo fica
+    numa trajetória própria e a chegada detectada é comparada com a real
+
+    Args:
+        noises (tuple): Desvios (m) do ruído testados
+        n_trials (int): Voos por nível de ruído
+        arrival (int): Frames do cruzamento até o cabeceio
+        tolerance (int): Erro máximo (frames) para contar como acerto
+        seed (int): Semente
+
+    Returns:
+        pd.DataFrame: Por ruído, a fração de acertos, a mediana do erro e a
+                      fração sem chegada detectada
+    """
+    results = []
+    for noise in noises:
+        flights = _synthetic_flights(n_trials, arrival, noise, seed=seed)
+        # Cada voo numa faixa de frames própria de uma única trajetória
+        stride = flights.shape[1] + 50
+        xyz = np.full((n_trials * stride, 3), np.nan, dtype=np.float32)
+        cross_frames = np.arange(n_trials) * stride
+        xyz[cross_frames[:, None] + np.arange(flights.shape[1])] = flights
+
+        detected = cross_flights({'first_frame': 0, 'xyz': xyz}, cross_frames)
+        error = detected["arrival_frame"].to_numpy() - cross_frames - arrival
+        missed = detected["arrival_frame"].to_numpy() < 0
+
+        results.append({
+            'noise': noise,
+            'hit_rate': float((~missed & (np.abs(error) <= tolerance)).mean()),
+            'median_error': float(np.median(error[~missed])) if (~missed).any() else np.nan,
+            'missed': float(missed.mean()),
+        })
+
+    return pd.DataFrame(results)
+
+
+def main():
+    results = check_arrival_detection()
+    print(results.to_string(index=False))
+
+    if (results["hit_rate"] < 0.95).any():
+        raise SystemExit("Detecção da chegada falhou em voos com ruído")
+
+
+if __name__ == "__main__":
+    main()
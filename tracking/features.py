@@ -2,6 +2,8 @@ from typing import Tuple
 import pandas as pd
 import numpy as np
 
+from utils.pc import compute_cross_pitch_control_features
+
 
 def count_players_in_box(frame_df: pd.DataFrame, attacking_team_id: int) -> Tuple[int]:
     """
@@ -38,7 +40,18 @@ def count_players_in_box(frame_df: pd.DataFrame, attacking_team_id: int) -> Tupl
 
 
 
-def count_players_in_zone(frame: pd.DataFrame, action: pd.Series):
+def count_players_in_zone(frame: pd.DataFrame, action: pd.Series, time_to_target: float = None):
+    """
+    Conta atacantes e defensores que conseguem chegar perto do alvo do
+    cruzamento antes da bola.
+
+    Parâmetros:
+        frame: tracking do frame do cruzamento.
+        action: cruzamento (team_id, start/end x/y).
+        time_to_target: tempo de voo real da bola em segundos (ex:
+            tracking.ball.cross_flights); se None ou NaN, estimado pela
+            distância com velocidade constante.
+    """
     def estimate_time_to_target(start_x, start_y, end_x, end_y, ball_speed=18):
         distance = np.sqrt((end_x - start_x)**2 + (end_y - start_y)**2)
         time = distance / ball_speed
@@ -78,7 +91,8 @@ def count_players_in_zone(frame: pd.DataFrame, action: pd.Series):
     end_x = action["end_x"]
     end_y = action["end_y"]
 
-    time_to_target = estimate_time_to_target(start_x, start_y, end_x, end_y)
+    if time_to_target is None or np.isnan(time_to_target):
+        time_to_target = estimate_time_to_target(start_x, start_y, end_x, end_y)
 
 
     for _, player in frame.iterrows():
@@ -96,4 +110,76 @@ def count_players_in_zone(frame: pd.DataFrame, action: pd.Series):
             else:
                 num_defenders += 1
 
-    return num_attackers, num_defenders
\ No newline at end of file
+    return num_attackers, num_defenders
+
+def stack_cross_frames(tracking_df: pd.DataFrame, crosses: pd.DataFrame, n_slots: int = 11) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Empilha o frame de cada cruzamento em arrays de tamanho fixo, separando
+    atacantes e defensores.
+
+    Parâmetros:
+        tracking_df: tracking já processado (tracking.process.process), com a
+            coluna possession_event_id marcando o frame de cada cruzamento.
+        crosses: DataFrame com as colunas event_id e team_id de cada cruzamento.
+        n_slots: número máximo de jogadores por time.
+
+    Retorno:
+        attacking_players: array (n_crosses, n_slots, 4) com [x, y, vx, vy]
+        defending_players: array (n_crosses, n_slots, 4) com [x, y, vx, vy]
+        Slots sem jogador (ou cruzamentos sem tracking) ficam com NaN.
+    """
+    event_ids = pd.Index(crosses["event_id"].astype("int64"))
+
+    frames = tracking_df[tracking_df["possession_event_id"].isin(event_ids)]
+
+    # Se o evento estiver marcado em mais de um frame, usa apenas o primeiro
+    first_frame = frames.groupby("possession_event_id")["frame_num"].transform("min")
+    frames = frames[frames["frame_num"] == first_frame]
+
+    cross_idx = event_ids.get_indexer(frames["possession_event_id"].astype("int64"))
+    is_attacker = frames["team_id"].to_numpy() == crosses["team_id"].to_numpy()[cross_idx]
+    slot = frames.groupby([frames["possession_event_id"].to_numpy(), is_attacker]).cumcount().to_numpy()
+
+    values = frames[["x", "y", "vx", "vy"]].to_numpy(dtype=float)
+    keep = slot < n_slots
+
+    attacking_players = np.full((len(event_ids), n_slots, 4), np.nan)
+    defending_players = np.full((len(event_ids), n_slots, 4), np.nan)
+
+    att = keep & is_attacker
+    dfd = keep & ~is_attacker
+    attacking_players[cross_idx[att], slot[att]] = values[att]
+    defending_players[cross_idx[dfd], slot[dfd]] = values[dfd]
+
+    return attacking_players, defending_players
+
+
+def pitch_control_features(tracking_df: pd.DataFrame, crosses: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula, em lote, as features de pitch control de todos os cruzamentos de
+    uma partida a partir do tracking padronizado.
+
+    Parâmetros:
+        tracking_df: tracking já processado (tracking.process.process).
+        crosses: gamestates dos cruzamentos da partida (event_id, team_id,
+            end_x, end_y).
+
+    Retorno:
+        DataFrame indexado por event_id com as colunas pc_attack_at_target,
+        pc_box, pc_near_post e pc_far_post.
+    """
+    attacking_players, defending_players = stack_cross_frames(tracking_df, crosses)
+
+    features = compute_cross_pitch_control_features(
+        attacking_players,
+        defending_players,
+        crosses[["end_x", "end_y"]].to_numpy(dtype=float),
+    )
+
+    features = pd.DataFrame(features, index=crosses["event_id"].astype("int64").to_numpy())
+
+    # Cruzamentos sem frame de tracking não tem pitch control
+    has_frame = ~np.isnan(attacking_players[:, 0, 0]) | ~np.isnan(defending_players[:, 0, 0])
+    features.loc[~has_frame, :] = np.nan
+
+    return features
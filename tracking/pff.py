@@ -0,0 +1,226 @@
+import argparse
+import bz2
+import json
+import os
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .windows import CROSS_WINDOW, extract_windows
+
+# Mesmo valor de possession_type gerado pelo gandula (old/pff.py)
+CROSS_POSSESSION_TYPE = "Frame_PossessionEventType.CROSS"
+
+# Códigos de possession_event_type do JSON bruto da PFF
+POSSESSION_TYPES = {
+    "PA": "Frame_PossessionEventType.PASS",
+    "CR": CROSS_POSSESSION_TYPE,
+    "SH": "Frame_PossessionEventType.SHOT",
+    "CL": "Frame_PossessionEventType.CLEARANCE",
+    "BC": "Frame_PossessionEventType.BALL_CARRY",
+    "CH": "Frame_PossessionEventType.CHALLENGE",
+    "RE": "Frame_PossessionEventType.REBOUND",
+    "TC": "Frame_PossessionEventType.TOUCH",
+    "IT": "Frame_PossessionEventType.INITIAL_TOUCH",
+}
+
+CROSS_COLUMNS = [
+    "frame_id", "period", "shirt", "x", "y", "team",
+    "ball_x", "ball_y", "ball_z", "vx", "vy", "speed", "possession_type", "cross_id",
+]
+
+
+def _decode_frame(line, smoothed=True):
+    """
+    Lê uma linha do JSON da PFF e devolve (frame_id, possession_type, linhas
+    dos jogadores), só com os campos usados nas janelas de cruzamento
+    """
+    frame = json.loads(line)
+
+    frame_id = int(frame["frameNum"])
+    period = frame.get("period")
+    elapsed = frame.get("periodElapsedTime")
+
+    possession_event = frame.get("possession_event") or {}
+    possession_type = POSSESSION_TYPES.get(possession_event.get("possession_event_type"))
+
+    ball = frame.get("ballsSmoothed") if smoothed else None
+    if not ball:
+        balls = frame.get("balls") or [{}]
+        ball = balls[0] if isinstance(balls, list) else balls
+    ball_x, ball_y, ball_z = ball.get("x"), ball.get("y"), ball.get("z")
+
+    rows = []
+    for team in ("home", "away"):
+        players = frame.get(f"{team}PlayersSmoothed") if smoothed else None
+        for player in players or frame.get(f"{team}Players") or []:
+            rows.append((
+                frame_id, period, elapsed, int(player["jerseyNum"]), player["x"], player["y"], team,
+                ball_x, ball_y, ball_z, possession_type,
+            ))
+
+    return frame_id, possession_type, rows
+
+
+def _window_dataframe(frames, cross_frames, first_cross_id, window, multi=False):
+    """
+    Monta o DataFrame de um intervalo de frames (janelas de cruzamento já
+    juntadas): velocidade suavizada, cross_id e padronização de direção como
+    no create_match_cross_df
+    """
+    df = pd.DataFrame(
+        [row for rows in frames for row in rows],
+        columns=["frame_id", "period", "elapsed", "shirt", "x", "y", "team",
+                 "ball_x", "ball_y", "ball_z", "possession_type"],
+    )
+
+    # Velocidade por jogador dentro do intervalo, suavizada como no smooth_velocity_by_player
+    df = df.sort_values(["team", "shirt", "frame_id"], kind="stable")
+    grouped = df.groupby(["team", "shirt", "period"], sort=False)
+    dt = grouped["elapsed"].diff()
+    df["vx"] = grouped["x"].diff() / dt
+    df["vy"] = grouped["y"].diff() / dt
+    df["speed"] = np.hypot(df["vx"], df["vy"])
+    df[["vx", "vy", "speed"]] = (
+        df.groupby(["team", "shirt"], sort=False)[["vx", "vy", "speed"]]
+          .transform(lambda x: x.rolling(window=5, min_periods=1, center=True).mean())
+    )
+
+    df = df.sort_values(["frame_id", "team", "shirt"]).reset_index(drop=True)
+
+    # Lado do campo de cada cruzamento pela bola no frame do próprio
+    # cruzamento (standardize_attack_direction), antes de recortar as janelas
+    ball_x = df.groupby("frame_id")["ball_x"].first()
+    cross_ids = (first_cross_id + np.arange(len(cross_frames))).astype(float)
+    to_flip = cross_ids[ball_x.reindex(cross_frames).to_numpy() < 0]
+
+    # Com multi, frames de janelas sobrepostas saem uma vez por cruzamento;
+    # senão ficam com o último cruzamento, como no loop do create_match_cross_df
+    df = extract_windows(df, cross_frames, window, window, ids=cross_ids, id_column="cross_id", multi=multi)
+
+    flip = df["cross_id"].isin(to_flip)
+    df.loc[flip, ["x", "vx", "ball_x"]] = -df.loc[flip, ["x", "vx", "ball_x"]]
+
+    df = df.sort_values(["cross_id", "frame_id", "team", "shirt"] if multi else ["frame_id", "team", "shirt"])
+
+    return df[CROSS_COLUMNS].reset_index(drop=True)
+
+
+def stream_cross_windows(data_path, game_id, output_path=None, window=CROSS_WINDOW, smoothed=True,
+                         multi=False, row_group_size=100_000):
+    """
+    Lê o .jsonl.bz2 de uma partida da PFF frame a frame e grava só as
+    janelas de ±window frames em volta dos cruzamentos, no mesmo formato do
+    create_match_cross_df do old/pff.py
+
+    Os frames recentes ficam em um buffer circular de `window` frames (o
+    "antes" de um cruzamento que ainda não apareceu). Ao achar um cruzamento
+    o buffer entra no intervalo aberto, e janelas que se sobrepõem viram um
+    único intervalo. Um intervalo é fechado quando nenhum cruzamento futuro
+    pode mais alcançá-lo, e então é processado e escrito como row groups do
+    parquet. A memória depende do tamanho das janelas, não da partida.
+
+    Args:
+        data_path (str): Diretório com os arquivos <game_id>.jsonl.bz2
+        game_id (int): Id da partida
+        output_path (str): Parquet de saída (./data/cross_<game_id>.parquet se None)
+        window (int): Frames antes e depois de cada cruzamento
+        smoothed (bool): Usa as posições suavizadas da PFF quando existirem
+        multi (bool): Frames de janelas sobrepostas são gravados uma vez por
+            cruzamento (senão ficam só com o último, como no old/pff.py)
+        row_group_size (int): Linhas acumuladas antes de escrever um row group
+
+    Returns:
+        dict: 'output_path', 'n_crosses', 'n_frames' (frames lidos) e
+              'intervals' (lista de (primeiro frame, último frame) gravados)
+    """
+    output_path = output_path or f"./data/cross_{game_id}.parquet"
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    buffer = deque(maxlen=window)
+    interval, interval_crosses = [], []
+    claim_until = None
+    pending, pending_rows = [], 0
+    intervals = []
+    n_crosses, n_frames = 0, 0
+    writer = None
+
+    def write(tables):
+        nonlocal writer
+        if not tables:
+            return
+        table = pa.concat_tables(tables)
+        if writer is None:
+            writer = pq.ParquetWriter(output_path, table.schema)
+        writer.write_table(table, row_group_size=row_group_size)
+
+    def close_interval():
+        nonlocal interval, interval_crosses, claim_until, pending, pending_rows, n_crosses
+        df = _window_dataframe([rows for _, rows in interval], interval_crosses, n_crosses, window, multi)
+        intervals.append((interval[0][0], interval[-1][0]))
+        n_crosses += len(interval_crosses)
+        interval, interval_crosses, claim_until = [], [], None
+
+        pending.append(pa.Table.from_pandas(df, preserve_index=False))
+        pending_rows += len(df)
+        if pending_rows >= row_group_size:
+            write(pending)
+            pending, pending_rows = [], 0
+
+    with bz2.open(os.path.join(data_path, f"{game_id}.jsonl.bz2"), "rt") as file:
+        for line in file:
+            if not line.strip():
+                continue
+
+            frame_id, possession_type, rows = _decode_frame(line, smoothed)
+            n_frames += 1
+
+            # Nenhum cruzamento futuro alcança mais o intervalo aberto
+            if claim_until is not None and frame_id > claim_until + window:
+                close_interval()
+
+            if possession_type == CROSS_POSSESSION_TYPE:
+                # O "antes" do cruzamento sai do buffer para o intervalo
+                interval.extend(item for item in buffer if item[0] >= frame_id - window)
+                buffer.clear()
+                interval_crosses.append(frame_id)
+                claim_until = frame_id + window
+
+            if claim_until is not None and frame_id <= claim_until and not buffer:
+                interval.append((frame_id, rows))
+            else:
+                buffer.append((frame_id, rows))
+
+    if claim_until is not None:
+        close_interval()
+    write(pending)
+
+    if writer is not None:
+        writer.close()
+
+    print(f"{n_crosses} cruzamentos de {n_frames} frames salvos em: {output_path}")
+
+    return {
+        'output_path': output_path,
+        'n_crosses': n_crosses,
+        'n_frames': n_frames,
+        'intervals': intervals,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extrai as janelas de cruzamento de um jogo da PFF (.jsonl.bz2)")
+    parser.add_argument("game_ids", type=int, nargs="+")
+    parser.add_argument("--data-path", default="./data")
+    parser.add_argument("--window", type=int, default=CROSS_WINDOW)
+    args = parser.parse_args()
+
+    for game_id in args.game_ids:
+        stream_cross_windows(args.data_path, game_id, window=args.window)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import pandas as pd
 
+from .windows import extract_windows
+
 def _calculate_smoothed_velocity(tracking_df: pd.DataFrame, window_size=8, frame_rate=25) -> pd.DataFrame:
     """
     Calcula a velocidade suavizada (vx, vy) dos jogadores a partir do tracking_df.
@@ -31,7 +33,7 @@ def _calculate_smoothed_velocity(tracking_df: pd.DataFrame, window_size=8, frame
     return df
 
 
-def _standardize_crossings_direction(cross_tracking_df, cross_events_df):
+def _standardize_crossings_direction(cross_tracking_df, cross_events_df, event_column="possession_event_id"):
     df = cross_tracking_df.copy()
 
     for _, event in cross_events_df.iterrows():
@@ -40,9 +42,13 @@ def _standardize_crossings_direction(cross_tracking_df, cross_events_df):
         player_jersey_num = event["player_jersey_num"]
 
 
-        mask = df["possession_event_id"] == event_id
+        mask = df[event_column] == event_id
         frame = df.loc[mask]
 
+        # Em janelas, o lado do campo é decidido pelo frame do cruzamento
+        if "window_offset" in frame.columns:
+            frame = frame[frame["window_offset"] == 0]
+
         player_with_ball = frame[
             (frame["jersey_number"] == player_jersey_num) &
             (frame["team_id"] == team_id)
@@ -66,12 +72,17 @@ def _standardize_crossings_direction(cross_tracking_df, cross_events_df):
 
     return df
 
-def process(tracking_df: pd.DataFrame, actions: pd.DataFrame, match_id: int) -> pd.DataFrame:
+def process(tracking_df: pd.DataFrame, actions: pd.DataFrame, match_id: int, window=0) -> pd.DataFrame:
     """
     Processa os dados brutos de tracking vindo do parquet.
     Vai adicionar as velocidades suavizadas, filtrar apenas os
     frames de cruzamento e padronizar para tudo ocorrer no mesmo
     lado do campo
+
+    Com window > 0, mantém os frames de ±window em volta do primeiro
+    frame de cada cruzamento. Frames em janelas sobrepostas aparecem uma
+    vez por cruzamento, identificados pelas colunas cross_event_id e
+    window_offset
     """
     tracking_df = _calculate_smoothed_velocity(tracking_df)
 
@@ -80,6 +91,17 @@ def process(tracking_df: pd.DataFrame, actions: pd.DataFrame, match_id: int) ->
         (actions["match_id"] == match_id)
     ].copy()
     
+    if window:
+        is_cross = tracking_df["possession_event_id"].isin(actions["event_id"].tolist())
+        cross_frames = tracking_df[is_cross].groupby("possession_event_id")["frame_num"].min()
+
+        tracking_df = extract_windows(
+            tracking_df, cross_frames.to_numpy(), window, window, frame_column="frame_num",
+            ids=cross_frames.index.to_numpy(), id_column="cross_event_id",
+        )
+
+        return _standardize_crossings_direction(tracking_df, actions, event_column="cross_event_id")
+
     tracking_df = tracking_df[tracking_df["possession_event_id"].isin(actions["event_id"].tolist())].copy()
 
     tracking_df = _standardize_crossings_direction(tracking_df, actions)
@@ -1,7 +1,19 @@
 import ast
 import pandas as pd
 
-def read_by_match_id(match_id: int) -> pd.DataFrame:
+from .ball import ball_track
+
+def read_by_match_id(match_id: int, with_ball=False):
+    """
+    Lê o tracking de uma partida, sem as linhas da bola
+
+    Args:
+        match_id (int): Id da partida
+        with_ball (bool): Devolve também a trajetória da bola (tracking.ball.ball_track)
+
+    Returns:
+        pd.DataFrame: Tracking dos jogadores, ou (tracking, trajetória da bola) com with_ball
+    """
     tracking_df = pd.read_parquet(f"./data/{match_id}.parquet")
 
     metadata_df = pd.read_csv("./data/metadata.csv")
@@ -29,6 +41,12 @@ def read_by_match_id(match_id: int) -> pd.DataFrame:
     tracking_df["frame_num"] =  pd.to_numeric(tracking_df["frame_num"])
     tracking_df["jersey_number"] =  pd.to_numeric(tracking_df["jersey_number"])
 
-    tracking_df = tracking_df[tracking_df['element'] != 'ball'].reset_index(drop=True)
+    is_ball = tracking_df['element'] == 'ball'
+    ball = ball_track(tracking_df[is_ball]) if with_ball else None
+
+    tracking_df = tracking_df[~is_ball].reset_index(drop=True)
+
+    if with_ball:
+        return tracking_df, ball
 
-    return tracking_df 
\ No newline at end of file
+    return tracking_df
@@ -0,0 +1,185 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+from tqdm import tqdm
+
+from .tensors import PLAYERS_PER_TEAM, TENSORS_PATH, load_cross_tensors
+
+SIMILAR_PATH = "./data/similar/"
+
+# Grade sobre a área e a entrada da área (coordenadas padronizadas, ataque
+# para x positivo), com um ponto a cada ~4.5m x ~6m
+EMBEDDING_ZONE = ((30.0, 52.5), (-25.0, 25.0))
+EMBEDDING_SHAPE = (6, 9)
+
+# Desvio (m) do núcleo gaussiano de cada jogador na grade
+EMBEDDING_BANDWIDTH = 4.0
+
+
+def _grid_points(zone, shape):
+    (x_min, x_max), (y_min, y_max) = zone
+    X, Y = np.meshgrid(np.linspace(x_min, x_max, shape[0]), np.linspace(y_min, y_max, shape[1]), indexing="ij")
+    return np.column_stack([X.ravel(), Y.ravel()])
+
+
+def cross_embeddings(attacking_players, defending_players, zone=EMBEDDING_ZONE, shape=EMBEDDING_SHAPE,
+                     bandwidth=EMBEDDING_BANDWIDTH) -> np.ndarray:
+    """
+    Embedding de tamanho fixo da configuração de cada cruzamento: ocupação
+    suavizada (soma de gaussianas dos jogadores) de atacantes e de
+    defensores em cada ponto da grade. Como é uma soma sobre os jogadores,
+    não depende da ordem nem do número de slots preenchidos.
+
+    Args:
+        attacking_players (np.ndarray): (n, slots, >=2) com x, y nas duas
+            primeiras colunas e NaN nos slots vazios (ex: stack_cross_frames
+            ou o frame do cruzamento dos tensores)
+        defending_players (np.ndarray): Mesmo formato, defensores
+        zone (tuple): ((x_min, x_max), (y_min, y_max)) da grade
+        shape (tuple): Pontos da grade em x e y
+        bandwidth (float): Desvio do núcleo (m)
+
+    Returns:
+        np.ndarray: float32 (n, 2 * pontos), atacantes e depois defensores
+    """
+    points = _grid_points(zone, shape)
+
+    def occupancy(players):
+        positions = np.asarray(players, dtype=float)[..., :2]
+        # (n, slots, 1, 2) - (1, 1, pontos, 2)
+        diff = positions[:, :, None, :] - points[None, None]
+        density = np.exp(-(diff ** 2).sum(axis=-1) / (2 * bandwidth ** 2))
+        return np.nan_to_num(density).sum(axis=1)
+
+    return np.hstack([occupancy(attacking_players), occupancy(defending_players)]).astype(np.float32)
+
+
+def _mirror_embeddings(embeddings, shape=EMBEDDING_SHAPE):
+    """
+    Embedding do cruzamento espelhado (y -> -y): a grade é simétrica em y,
+    então basta inverter o eixo y dos pontos
+    """
+    grids = embeddings.reshape(len(embeddings), 2, shape[0], shape[1])
+    return grids[..., ::-1].reshape(len(embeddings), -1)
+
+
+def build_similar_index(tensors_path=TENSORS_PATH, output_path=SIMILAR_PATH, batch_size=4096,
+                        leaf_size=40) -> dict:
+    """
+    Monta o índice de cruzamentos parecidos a partir dos tensores gravados
+    por tracking.tensors.write_cross_tensors (frame do cruzamento de cada
+    janela), lendo o memmap em lotes, e salva em output_path
+
+    Args:
+        tensors_path (str): Diretório dos tensores
+        output_path (str): Diretório do índice
+        batch_size (int): Cruzamentos por lote
+        leaf_size (int): Tamanho das folhas da BallTree
+
+    Returns:
+        dict: Índice (ver load_similar_index)
+    """
+    tensors = load_cross_tensors(tensors_path)
+    data, mask = tensors['data'], tensors['mask']
+    features = tensors['meta']['features']
+    center = tensors['meta']['before']
+    columns = [features.index("x"), features.index("y")]
+
+    print(f"Calculando embeddings de {len(data)} cruzamentos...")
+
+    embeddings = []
+    for start in tqdm(range(0, len(data), batch_size), desc="Lotes"):
+        frame = np.asarray(data[start:start + batch_size, center][..., columns])
+        frame[~np.asarray(mask[start:start + batch_size, center])] = np.nan
+        embeddings.append(cross_embeddings(frame[:, :PLAYERS_PER_TEAM], frame[:, PLAYERS_PER_TEAM:]))
+
+    embeddings = np.concatenate(embeddings) if embeddings else np.empty((0, 2 * np.prod(EMBEDDING_SHAPE)), np.float32)
+
+    # Cruzamentos sem nenhum jogador no frame não entram no índice
+    has_players = mask[:, center].any(axis=1)
+    crosses = tensors['crosses'][has_players].reset_index(drop=True)
+    embeddings = embeddings[has_players]
+
+    index = {
+        'tree': BallTree(embeddings, leaf_size=leaf_size),
+        'embeddings': embeddings,
+        'crosses': crosses,
+        'params': {'zone': EMBEDDING_ZONE, 'shape': EMBEDDING_SHAPE, 'bandwidth': EMBEDDING_BANDWIDTH},
+    }
+
+    os.makedirs(output_path, exist_ok=True)
+    joblib.dump(index, os.path.join(output_path, "similar_index.joblib"))
+    print(f"Índice com {len(crosses)} cruzamentos salvo em: {output_path}")
+
+    return index
+
+
+def load_similar_index(path=SIMILAR_PATH) -> dict:
+    """
+    Lê o índice salvo por build_similar_index
+
+    Returns:
+        dict: 'tree' (BallTree), 'embeddings', 'crosses' (match_id, event_id
+              e team_id de cada linha) e 'params'
+    """
+    return joblib.load(os.path.join(path, "similar_index.joblib"))
+
+
+def similar_crosses(index: dict, event_id=None, embedding=None, k=10, mirror=False,
+                    exclude_same_match=False) -> pd.DataFrame:
+    """
+    Os k cruzamentos mais parecidos com um cruzamento do índice (event_id)
+    ou com um embedding qualquer (ex: cross_embeddings de um frame novo)
+
+    Args:
+        index (dict): Saída de build_similar_index ou load_similar_index
+        event_id (int): Cruzamento de referência (fica fora do resultado)
+        embedding (np.ndarray): Embedding de referência, se não houver event_id
+        k (int): Número de vizinhos
+        mirror (bool): Procura também o espelho da referência, achando
+            cruzamentos parecidos vindos do outro lado
+        exclude_same_match (bool): Ignora cruzamentos da mesma partida
+
+    Returns:
+        pd.DataFrame: match_id, event_id, team_id, distance e mirrored,
+                      ordenado pela distância
+    """
+    crosses = index['crosses']
+
+    if event_id is not None:
+        rows = np.flatnonzero(crosses["event_id"].to_numpy() == event_id)
+        if len(rows) == 0:
+            raise ValueError(f"Cruzamento {event_id} não está no índice")
+        embedding = index['embeddings'][rows[:1]]
+        match_id = crosses["match_id"].iloc[rows[0]]
+    elif embedding is None:
+        raise ValueError("Informe event_id ou embedding")
+    else:
+        embedding = np.asarray(embedding, dtype=np.float32).reshape(1, -1)
+        match_id = None
+
+    queries = [embedding]
+    if mirror:
+        queries.append(_mirror_embeddings(embedding, index['params']['shape']))
+
+    # Vizinhos extras para sobrar k depois de tirar a própria referência e a partida
+    n_extra = 1 + (int((crosses["match_id"] == match_id).sum()) if exclude_same_match and match_id is not None else 0)
+    n_neighbors = min(k + n_extra, len(crosses))
+
+    distances, positions = index['tree'].query(np.vstack(queries), k=n_neighbors)
+
+    result = pd.concat([
+        crosses.iloc[positions[i]].assign(distance=distances[i], mirrored=bool(i))
+        for i in range(len(queries))
+    ])
+    result = result.sort_values("distance").drop_duplicates("event_id")
+
+    if event_id is not None:
+        result = result[result["event_id"] != event_id]
+    if exclude_same_match and match_id is not None:
+        result = result[result["match_id"] != match_id]
+
+    return result.head(k).reset_index(drop=True)
@@ -0,0 +1,216 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+SYNC_PATH = "./data/sync/"
+
+# Período multiplicado por esse valor vira uma chave única e ordenada
+# (período, relógio) para um único searchsorted em todos os períodos
+_PERIOD_KEY = 1e6
+
+# Diferença máxima (s) entre o tempo procurado e o frame mais próximo
+SYNC_TOLERANCE = 0.5
+
+
+def event_seconds(events: pd.DataFrame, column="timestamp") -> np.ndarray:
+    """
+    Tempo de cada evento em segundos desde o início do período, aceitando
+    timedelta ou número (como no convert_to_spadl)
+    """
+    timestamp = events[column]
+    if pd.api.types.is_timedelta64_dtype(timestamp):
+        return timestamp.dt.total_seconds().to_numpy(dtype=float)
+
+    seconds = pd.to_numeric(timestamp, errors="coerce")
+    if seconds.notna().sum() < timestamp.notna().sum():
+        seconds = pd.to_timedelta(timestamp, errors="coerce").dt.total_seconds()
+
+    return seconds.to_numpy(dtype=float)
+
+
+def build_sync_index(tracking_df: pd.DataFrame, events=None, period_column="period",
+                     clock_column="period_game_clock") -> dict:
+    """
+    Índice de sincronização de uma partida: relógio de cada frame ordenado
+    por (período, relógio), para achar o frame de qualquer instante com
+    searchsorted
+
+    Se os eventos forem passados, o deslocamento entre o relógio do tracking e
+    o timestamp dos eventos é estimado por período (mediana da diferença nos
+    frames marcados com possession_event_id)
+
+    Args:
+        tracking_df (pd.DataFrame): Tracking da partida (frame_num, período e relógio)
+        events (pd.DataFrame): Eventos da partida (event_id, period_id, timestamp)
+        period_column (str): Coluna do período no tracking
+        clock_column (str): Coluna do relógio (s) no tracking
+
+    Returns:
+        dict: 'key' (período * 1e6 + relógio, ordenado), 'clock', 'frame',
+              'period' e 'offsets' (período -> segundos somados ao timestamp do evento)
+    """
+    columns = ["frame_num", period_column, clock_column]
+    if "possession_event_id" in tracking_df.columns:
+        columns.append("possession_event_id")
+
+    frames = tracking_df[columns].drop_duplicates("frame_num")
+    frames = frames.dropna(subset=[period_column, clock_column])
+
+    period = frames[period_column].to_numpy(dtype=np.int64)
+    clock = frames[clock_column].to_numpy(dtype=float)
+    key = period * _PERIOD_KEY + clock
+    order = np.argsort(key, kind="stable")
+
+    index = {
+        'key': key[order],
+        'clock': clock[order],
+        'frame': frames["frame_num"].to_numpy(dtype=np.int64)[order],
+        'period': period[order],
+        'offsets': {},
+    }
+
+    if events is not None and "possession_event_id" in frames.columns:
+        index['offsets'] = estimate_offsets(frames.rename(columns={period_column: "period", clock_column: "clock"}),
+                                            events)
+
+    return index
+
+
+def estimate_offsets(frames: pd.DataFrame, events: pd.DataFrame) -> dict:
+    """
+    Deslocamento (s) entre o relógio do tracking e o timestamp dos eventos
+    em cada período, pela mediana nos eventos com frame marcado
+
+    Args:
+        frames (pd.DataFrame): Um frame por linha (possession_event_id, period, clock)
+        events (pd.DataFrame): Eventos (event_id, period_id, timestamp)
+    """
+    tagged = frames.dropna(subset=["possession_event_id"])
+    first = tagged.groupby("possession_event_id")["clock"].min()
+
+    seconds = pd.Series(event_seconds(events), index=events["event_id"].to_numpy())
+    seconds = seconds[~seconds.index.duplicated()]
+    periods = pd.Series(events["period_id"].to_numpy(), index=events["event_id"].to_numpy())
+    periods = periods[~periods.index.duplicated()]
+
+    common = first.index.intersection(seconds.index)
+    diff = pd.DataFrame({
+        'period': periods[common].to_numpy(),
+        'diff': first[common].to_numpy() - seconds[common].to_numpy(),
+    }).dropna()
+
+    return {int(period): float(value) for period, value in diff.groupby("period")["diff"].median().items()}
+
+
+def lookup_frames(index: dict, period_ids, seconds, offsets=0.0, tolerance=SYNC_TOLERANCE) -> np.ndarray:
+    """
+    Frame mais próximo de cada instante (período, segundos), vetorizado
+
+    Args:
+        index (dict): Saída de build_sync_index
+        period_ids (np.ndarray): Período de cada instante
+        seconds (np.ndarray): Segundos no relógio dos eventos (o deslocamento
+            do período, se estimado, é somado)
+        offsets (float ou list): Deslocamento extra (s); uma lista vira uma
+            coluna por deslocamento, ex: [0, 0.5, 1.0] para o instante do
+            evento e 0.5s/1s depois
+        tolerance (float): Diferença máxima até o frame; acima disso -1
+
+    Returns:
+        np.ndarray: frame_num de cada instante (n,) ou (n, deslocamentos); -1 sem frame
+    """
+    period_ids = np.asarray(period_ids, dtype=float)
+    seconds = np.asarray(seconds, dtype=float)
+    offsets = np.asarray(offsets, dtype=float)
+
+    period_offset = pd.Series(period_ids).map(index['offsets']).fillna(0.0).to_numpy(dtype=float)
+    times = seconds + period_offset
+    if offsets.ndim == 1:
+        times = times[:, None]
+        period_ids = period_ids[:, None]
+    times = times + offsets
+
+    key = index['key']
+    if len(key) == 0:
+        return np.full(np.broadcast(times, period_ids).shape, -1, dtype=np.int64)
+
+    target = period_ids * _PERIOD_KEY + times
+
+    # Vizinhos à esquerda e à direita; fica o mais próximo do mesmo período
+    right = np.clip(np.searchsorted(key, target), 0, len(key) - 1)
+    left = np.clip(right - 1, 0, len(key) - 1)
+    nearest = np.where(np.abs(key[left] - target) <= np.abs(key[right] - target), left, right)
+
+    valid = (
+        ~np.isnan(target) &
+        (index['period'][nearest] == period_ids) &
+        (np.abs(index['clock'][nearest] - times) <= tolerance)
+    )
+
+    return np.where(valid, index['frame'][nearest], -1)
+
+
+def event_frames(index: dict, events: pd.DataFrame, offsets=0.0, tolerance=SYNC_TOLERANCE) -> np.ndarray:
+    """
+    Frame de cada evento (e, com offsets, dos instantes depois dele) pelo
+    período e timestamp, sem depender do possession_event_id do tracking
+
+    Returns:
+        np.ndarray: frame_num por evento (-1 se não houver frame perto)
+    """
+    return lookup_frames(index, events["period_id"].to_numpy(dtype=float), event_seconds(events), offsets, tolerance)
+
+
+def _sync_file(match_id, path):
+    return os.path.join(path, f"{match_id}.npz")
+
+
+def match_sync_index(match_id: int, events=None, path=SYNC_PATH, data_path="./data") -> dict:
+    """
+    Índice de sincronização de uma partida, lido do cache ou montado a partir
+    de só quatro colunas do parquet de tracking e salvo em cache. Se o cache
+    não tiver deslocamentos e os eventos forem passados, é montado de novo.
+
+    Args:
+        match_id (int): Id da partida
+        events (pd.DataFrame): Eventos da partida, para estimar os deslocamentos
+        path (str): Diretório do cache
+        data_path (str): Diretório dos parquets de tracking
+
+    Returns:
+        dict: Saída de build_sync_index
+    """
+    sync_file = _sync_file(match_id, path)
+    if os.path.exists(sync_file):
+        with np.load(sync_file) as data:
+            index = {name: data[name] for name in ('key', 'clock', 'frame', 'period')}
+            index['offsets'] = dict(zip(data['offset_periods'].tolist(), data['offset_values'].tolist()))
+        # Cache montado sem eventos não tem deslocamentos: com eventos, monta de novo
+        if events is None or index['offsets']:
+            return index
+
+    tracking_df = pd.read_parquet(
+        os.path.join(data_path, f"{match_id}.parquet"),
+        columns=["frameNum", "period", "periodGameClockTime", "possession_event_id"],
+    )
+    tracking_df = tracking_df.rename(columns={
+        "frameNum": "frame_num",
+        "periodGameClockTime": "period_game_clock",
+    })
+    tracking_df["frame_num"] = pd.to_numeric(tracking_df["frame_num"])
+    tracking_df["possession_event_id"] = pd.to_numeric(tracking_df["possession_event_id"], errors="coerce")
+
+    if events is not None:
+        events = events[events["match_id"] == match_id]
+    index = build_sync_index(tracking_df, events)
+
+    os.makedirs(path, exist_ok=True)
+    np.savez(
+        sync_file,
+        key=index['key'], clock=index['clock'], frame=index['frame'], period=index['period'],
+        offset_periods=np.array(list(index['offsets'].keys()), dtype=np.int64),
+        offset_values=np.array(list(index['offsets'].values()), dtype=float),
+    )
+
+    return index
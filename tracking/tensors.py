@@ -0,0 +1,217 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+TENSORS_PATH = "./data/cross_tensors/"
+
+TENSOR_FEATURES = ("x", "y", "vx", "vy")
+PLAYERS_PER_TEAM = 11
+N_SLOTS = 2 * PLAYERS_PER_TEAM
+
+# Gol atacado depois da padronização (cruzamentos sempre para x positivo)
+ATTACKED_GOAL = (105 / 2, 0.0)
+
+
+def _slots(windows_df, cross_index, is_attacker):
+    """
+    Slot de cada linha: atacantes em 0-10 e defensores em 11-21, cada time
+    ordenado pela distância ao gol no frame do cruzamento (quem não aparece
+    nesse frame vai para o fim, por camisa). O slot de um jogador é o mesmo
+    em toda a janela.
+    """
+    players = pd.DataFrame({
+        'cross': cross_index,
+        'attacker': is_attacker,
+        'jersey': windows_df["jersey_number"].to_numpy(),
+        'team': windows_df["team_id"].to_numpy(),
+        'distance': np.where(
+            windows_df["window_offset"].to_numpy() == 0,
+            np.hypot(windows_df["x"].to_numpy() - ATTACKED_GOAL[0], windows_df["y"].to_numpy() - ATTACKED_GOAL[1]),
+            np.inf,
+        ),
+    })
+
+    keys = ['cross', 'team', 'jersey']
+    per_player = players.groupby(keys, sort=False).agg(attacker=('attacker', 'first'), distance=('distance', 'min'))
+    per_player = per_player.reset_index().sort_values(['cross', 'attacker', 'distance', 'jersey'])
+    per_player['rank'] = per_player.groupby(['cross', 'attacker']).cumcount()
+    per_player['slot'] = np.where(per_player['attacker'], 0, PLAYERS_PER_TEAM) + per_player['rank']
+    per_player.loc[per_player['rank'] >= PLAYERS_PER_TEAM, 'slot'] = -1
+
+    position = pd.MultiIndex.from_frame(per_player[keys]).get_indexer(pd.MultiIndex.from_frame(players[keys]))
+
+    # Linhas sem camisa ou time não entram no tensor
+    return np.where(position >= 0, per_player['slot'].to_numpy()[position], -1)
+
+
+def cross_tensors(windows_df: pd.DataFrame, crosses: pd.DataFrame, before=25, after=25, features=TENSOR_FEATURES):
+    """
+    Converte janelas de tracking padronizado (formato longo) em arrays de
+    formato fixo (cruzamentos x T x 22 slots x features), sem loop por evento
+
+    Args:
+        windows_df (pd.DataFrame): Saída de tracking.process.process com
+            window >= max(before, after) (cross_event_id, window_offset,
+            team_id, jersey_number e as features)
+        crosses (pd.DataFrame): Cruzamentos na ordem das linhas do tensor (event_id, team_id)
+        before (int): Frames antes do cruzamento
+        after (int): Frames depois do cruzamento
+        features (tuple): Colunas de cada jogador
+
+    Returns:
+        tuple: (data float32 (n, T, 22, F) com NaN no padding,
+                mask bool (n, T, 22) com True onde há jogador)
+    """
+    n_frames = before + after + 1
+    data = np.full((len(crosses), n_frames, N_SLOTS, len(features)), np.nan, dtype=np.float32)
+    mask = np.zeros((len(crosses), n_frames, N_SLOTS), dtype=bool)
+
+    event_ids = crosses["event_id"].to_numpy(dtype=np.int64)
+    cross_index = pd.Index(event_ids).get_indexer(windows_df["cross_event_id"].to_numpy(dtype=np.int64))
+    offsets = windows_df["window_offset"].to_numpy(dtype=np.int64)
+
+    keep = (cross_index >= 0) & (offsets >= -before) & (offsets <= after)
+    windows_df, cross_index, offsets = windows_df[keep], cross_index[keep], offsets[keep]
+    if windows_df.empty:
+        return data, mask
+
+    attacking_team = crosses["team_id"].to_numpy(dtype=np.int64)[cross_index]
+    is_attacker = windows_df["team_id"].to_numpy(dtype=np.int64) == attacking_team
+    slots = _slots(windows_df, cross_index, is_attacker)
+
+    valid = slots >= 0
+    index = (cross_index[valid], offsets[valid] + before, slots[valid])
+    data[index] = windows_df[list(features)].to_numpy(dtype=np.float32)[valid]
+    mask[index] = True
+
+    return data, mask
+
+
+def write_cross_tensors(actions: pd.DataFrame, match_ids=None, output_dir=TENSORS_PATH, before=25, after=25,
+                        features=TENSOR_FEATURES) -> dict:
+    """
+    Monta os tensores de todos os cruzamentos, partida por partida, direto em
+    arquivos .npy mapeados em memória: o tensor completo nunca fica em RAM e
+    os jobs de treino podem ler só os lotes que usam (ver load_cross_tensors)
+
+    Args:
+        actions (pd.DataFrame): Saída de read_actions
+        match_ids (list): Partidas (todas com cruzamento se None)
+        output_dir (str): Diretório de saída
+        before (int): Frames antes do cruzamento
+        after (int): Frames depois do cruzamento
+        features (tuple): Colunas de cada jogador
+
+    Returns:
+        dict: Metadados gravados em meta.json
+    """
+    from .process import process
+    from .read import read_by_match_id
+
+    crosses = actions[actions["action_type"] == "CROSS"]
+    if match_ids is not None:
+        crosses = crosses[crosses["match_id"].isin(list(match_ids))]
+    crosses = crosses[["match_id", "event_id", "team_id"]].dropna().astype("int64").reset_index(drop=True)
+
+    os.makedirs(output_dir, exist_ok=True)
+    n_frames = before + after + 1
+    data = np.lib.format.open_memmap(
+        os.path.join(output_dir, "tensors.npy"), mode="w+", dtype=np.float32,
+        shape=(len(crosses), n_frames, N_SLOTS, len(features)),
+    )
+    mask = np.lib.format.open_memmap(
+        os.path.join(output_dir, "mask.npy"), mode="w+", dtype=bool, shape=(len(crosses), n_frames, N_SLOTS),
+    )
+
+    print(f"Montando tensores de {len(crosses)} cruzamentos ({n_frames} frames x {N_SLOTS} slots x {len(features)} features)...")
+
+    for match_id, match_crosses in tqdm(crosses.groupby("match_id", sort=False), desc="Partidas"):
+        rows = match_crosses.index.to_numpy()
+
+        try:
+            tracking_df = read_by_match_id(match_id)
+        except FileNotFoundError:
+            # Sem tracking: as linhas ficam só com padding
+            data[rows] = np.nan
+            continue
+
+        windows_df = process(tracking_df, actions, match_id, window=max(before, after))
+        data[rows], mask[rows] = cross_tensors(windows_df, match_crosses, before, after, features)
+
+    data.flush()
+    mask.flush()
+    crosses.to_parquet(os.path.join(output_dir, "crosses.parquet"))
+
+    meta = {
+        'features': list(features),
+        'before': before,
+        'after': after,
+        'slots': {'attackers': [0, PLAYERS_PER_TEAM], 'defenders': [PLAYERS_PER_TEAM, N_SLOTS]},
+        'n_crosses': len(crosses),
+    }
+    with open(os.path.join(output_dir, "meta.json"), "w") as file:
+        json.dump(meta, file, indent=2)
+
+    print(f"Tensores salvos em: {output_dir}")
+
+    return meta
+
+
+def load_cross_tensors(path=TENSORS_PATH) -> dict:
+    """
+    Abre os tensores gravados por write_cross_tensors sem ler o arquivo
+    inteiro (np.load com mmap_mode='r')
+
+    Returns:
+        dict: 'data' (n, T, 22, F), 'mask' (n, T, 22), 'crosses' (event_id
+              de cada linha) e 'meta'
+    """
+    with open(os.path.join(path, "meta.json")) as file:
+        meta = json.load(file)
+
+    return {
+        'data': np.load(os.path.join(path, "tensors.npy"), mmap_mode="r"),
+        'mask': np.load(os.path.join(path, "mask.npy"), mmap_mode="r"),
+        'crosses': pd.read_parquet(os.path.join(path, "crosses.parquet")),
+        'meta': meta,
+    }
+
+
+def iter_cross_batches(path=TENSORS_PATH, batch_size=256, rows=None, mirror=False):
+    """
+    Lotes (data, mask, event_ids) lidos do memmap, para treino em streaming
+
+    Args:
+        path (str): Diretório dos tensores
+        batch_size (int): Cruzamentos por lote
+        rows (np.ndarray): Linhas usadas (ex: índices de treino), na ordem dada;
+            com mirror, linhas n..2n-1 são os espelhos de 0..n-1
+        mirror (bool): Inclui os cruzamentos espelhados (y e vy com sinal
+            trocado, ver utils.augment), montados só no lote; sem rows, as
+            2n linhas virtuais são percorridas
+
+    Yields:
+        tuple: (data, mask, event_ids) e, com mirror, também a flag de espelhado
+    """
+    tensors = load_cross_tensors(path)
+    event_ids = tensors['crosses']["event_id"].to_numpy()
+    n_rows = len(event_ids)
+
+    if mirror:
+        from utils.augment import augmented_rows, mirror_batch, mirror_plan
+        plan = mirror_plan(tensors['meta']['features'])
+
+    rows = np.arange(2 * n_rows if mirror else n_rows) if rows is None else np.asarray(rows)
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        if not mirror:
+            yield np.asarray(tensors['data'][batch]), np.asarray(tensors['mask'][batch]), event_ids[batch]
+            continue
+
+        base, mirrored = augmented_rows(n_rows, batch)
+        data = mirror_batch(tensors['data'][base], plan, mirrored)
+        yield data, np.asarray(tensors['mask'][base]), event_ids[base], mirrored
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+# Janela padrão dos cruzamentos: 120 frames antes e depois (±4.8s a 25 fps)
+CROSS_WINDOW = 120
+
+
+def window_bounds(centers, before=CROSS_WINDOW, after=CROSS_WINDOW):
+    """
+    Intervalos [início, fim] (inclusivos) das janelas, ordenados pelo centro
+
+    Returns:
+        tuple: (starts, ends, order), com order a posição de cada janela
+               ordenada em `centers`
+    """
+    centers = np.asarray(centers, dtype=np.int64)
+    order = np.argsort(centers, kind="stable")
+
+    return centers[order] - before, centers[order] + after, order
+
+
+def assign_windows(frames, centers, before=CROSS_WINDOW, after=CROSS_WINDOW) -> np.ndarray:
+    """
+    Janela de cada frame quando só uma é permitida: a de maior centro entre
+    as que contêm o frame (o cruzamento seguinte sobrescreve, como no loop
+    do create_match_cross_df)
+
+    Args:
+        frames (np.ndarray): Número de cada frame (qualquer ordem)
+        centers (np.ndarray): Frame central de cada janela
+        before (int): Frames antes do centro
+        after (int): Frames depois do centro
+
+    Returns:
+        np.ndarray: Posição da janela em `centers` para cada frame (-1 se nenhuma)
+    """
+    frames = np.asarray(frames, dtype=np.int64)
+    if len(centers) == 0:
+        return np.full(len(frames), -1, dtype=np.int64)
+
+    starts, ends, order = window_bounds(centers, before, after)
+
+    # Todas as janelas têm o mesmo tamanho, então os fins também estão
+    # ordenados: se a última janela que começa antes do frame não o contém,
+    # nenhuma outra contém
+    last = np.searchsorted(starts, frames, side="right") - 1
+    inside = (last >= 0) & (frames <= ends[np.maximum(last, 0)])
+
+    return np.where(inside, order[np.maximum(last, 0)], -1)
+
+
+def window_memberships(frames, centers, before=CROSS_WINDOW, after=CROSS_WINDOW):
+    """
+    Todos os pares (linha, janela) em que o frame da linha está dentro da
+    janela, para janelas que se sobrepõem. Custo O((linhas + janelas) log linhas
+    + pares), sem percorrer as linhas uma vez por janela.
+
+    Args:
+        frames (np.ndarray): Número do frame de cada linha (qualquer ordem)
+        centers (np.ndarray): Frame central de cada janela
+        before (int): Frames antes do centro
+        after (int): Frames depois do centro
+
+    Returns:
+        tuple: (rows, windows), posições das linhas em `frames` e das janelas
+               em `centers`, ordenados por janela e depois por frame
+    """
+    frames = np.asarray(frames, dtype=np.int64)
+    centers = np.asarray(centers, dtype=np.int64)
+
+    frame_order = np.argsort(frames, kind="stable")
+    sorted_frames = frames[frame_order]
+
+    lo = np.searchsorted(sorted_frames, centers - before, side="left")
+    hi = np.searchsorted(sorted_frames, centers + after, side="right")
+    counts = hi - lo
+
+    # Concatena os intervalos [lo, hi) de todas as janelas sem loop
+    total = counts.sum()
+    offsets = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+    positions = offsets + np.arange(total)
+
+    return frame_order[positions], np.repeat(np.arange(len(centers)), counts)
+
+
+def extract_windows(df: pd.DataFrame, centers, before=CROSS_WINDOW, after=CROSS_WINDOW, frame_column="frame_id",
+                    ids=None, id_column="window_id", multi=True) -> pd.DataFrame:
+    """
+    Recorta as janelas de frames em volta de cada centro
+
+    Args:
+        df (pd.DataFrame): Tracking (várias linhas por frame)
+        centers (list): Frame central de cada janela (ex: frames dos cruzamentos)
+        before (int): Frames antes do centro
+        after (int): Frames depois do centro
+        frame_column (str): Coluna com o número do frame
+        ids (list): Id de cada janela (posição em centers se None), ex: event_id
+        id_column (str): Nome da coluna com o id da janela
+        multi (bool): Se True, linhas em janelas sobrepostas aparecem uma vez
+            por janela; se False, ficam só na janela de maior centro
+
+    Returns:
+        pd.DataFrame: Linhas dentro de alguma janela, com as colunas
+                      `id_column` e 'window_offset' (frame - centro)
+    """
+    centers = np.asarray(centers, dtype=np.int64)
+    ids = np.arange(len(centers)) if ids is None else np.asarray(ids)
+    frames = df[frame_column].to_numpy(dtype=np.int64)
+
+    if multi:
+        rows, windows = window_memberships(frames, centers, before, after)
+    else:
+        windows = assign_windows(frames, centers, before, after)
+        rows = np.flatnonzero(windows >= 0)
+        windows = windows[rows]
+
+    out = df.iloc[rows].copy()
+    out[id_column] = ids[windows]
+    out["window_offset"] = frames[rows] - centers[windows]
+
+    return out.reset_index(drop=True)
@@ -1,7 +1,44 @@
-from . import io, vaep
+import importlib
 
+import numpy as np
 import pandas as pd
 
+# Submódulos carregados só no primeiro acesso (PEP 562), para que
+# "from utils import convert_to_spadl" ou "from utils.io import ..." não
+# carreguem sklearn, socceraction e xgboost junto com o VAEP
+_SUBMODULES = {
+    'augment', 'compact_forest', 'cross_model', 'events', 'export', 'feature_selection', 'feature_store', 'grids',
+    'import_benchmark', 'io', 'pc', 'player_stats', 'plot', 'registry', 'search',
+    'service', 'tracking', 'vaep',
+}
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES)
+
+def _lookup(values, mapping, default):
+    """
+    Mapeia uma coluna categórica para (ids, nomes) usando os códigos de um
+    pd.Categorical como índice em tabelas de lookup. Valores ausentes ou fora
+    do mapeamento recebem o default.
+    """
+    keys = list(mapping)
+    ids = np.array([mapping[k]['id'] for k in keys] + [default['id']], dtype=np.int64)
+    names = np.array([mapping[k]['name'] for k in keys] + [default['name']], dtype=object)
+
+    # Código -1 (NA ou categoria desconhecida) aponta para o último item: o default
+    codes = pd.Categorical(values, categories=keys).codes
+
+    return np.take(ids, codes), np.take(names, codes)
+
 def convert_to_spadl(events_df):
     """Converte DataFrame de eventos para formato SPADL compatível com socceractions"""
     
@@ -52,24 +89,6 @@ def convert_to_spadl(events_df):
         'knee': {'id': 4, 'name': 'other'}
     }
     
-    # Função auxiliar para mapear valores
-    def map_action_type(event_type):
-        mapping = action_type_mapping.get(event_type, {'id': 17, 'name': 'other'})
-        return pd.Series([mapping['id'], mapping['name']])
-    
-    def map_result(result_val):
-        if pd.isna(result_val):
-            return pd.Series([0, 'fail'])
-        mapping = result_mapping.get(result_val, {'id': 0, 'name': 'fail'})
-        return pd.Series([mapping['id'], mapping['name']])
-    
-    def map_bodypart(bodypart_val):
-        if pd.isna(bodypart_val):
-            bodypart_val = 'foot'
-        bodypart_val = str(bodypart_val).lower()
-        mapping = bodypart_mapping.get(bodypart_val, {'id': 0, 'name': 'foot'})
-        return pd.Series([mapping['id'], mapping['name']])
-    
     # Criar DataFrame SPADL
     spadl_df = pd.DataFrame()
     
@@ -80,10 +99,11 @@ def convert_to_spadl(events_df):
     
     # Timestamp - converter para segundos
     if 'timestamp' in events_df.columns:
-        if hasattr(events_df['timestamp'].iloc[0] if len(events_df) > 0 else None, 'total_seconds'):
-            spadl_df['time_seconds'] = events_df['timestamp'].apply(lambda x: x.total_seconds() if pd.notna(x) else 0)
+        timestamp = events_df['timestamp']
+        if pd.api.types.is_timedelta64_dtype(timestamp) or hasattr(timestamp.iloc[0] if len(events_df) > 0 else None, 'total_seconds'):
+            spadl_df['time_seconds'] = pd.to_timedelta(timestamp).dt.total_seconds().fillna(0)
         else:
-            spadl_df['time_seconds'] = pd.to_numeric(events_df['timestamp'], errors='coerce').fillna(0)
+            spadl_df['time_seconds'] = pd.to_numeric(timestamp, errors='coerce').fillna(0)
     else:
         spadl_df['time_seconds'] = 0
     
@@ -98,26 +118,31 @@ def convert_to_spadl(events_df):
     spadl_df['end_y'] = events_df['end_coordinates_y'].fillna(events_df['coordinates_y']) * 68
     
     # Mapear tipos de ação
-    action_mapping = events_df['event_type'].apply(lambda x: map_action_type(x))
-    spadl_df['type_id'] = action_mapping.iloc[:, 0]
-    spadl_df['type_name'] = action_mapping.iloc[:, 1]
+    spadl_df['type_id'], spadl_df['type_name'] = _lookup(
+        events_df['event_type'], action_type_mapping, {'id': 17, 'name': 'other'}
+    )
     
     # Mapear resultados
     if 'result' in events_df.columns and events_df['result'].notna().any():
-        result_mapping_series = events_df['result'].apply(lambda x: map_result(x))
+        result_col = events_df['result']
     else:
         # Usar coluna success se disponível
-        success_col = events_df.get('success', False)
-        result_mapping_series = success_col.apply(lambda x: map_result('COMPLETE' if x else 'INCOMPLETE'))
+        success_col = events_df['success'] if 'success' in events_df.columns else pd.Series(False, index=events_df.index)
+        success_col = success_col.astype('boolean').fillna(False).to_numpy(dtype=bool)
+        result_col = np.where(success_col, 'COMPLETE', 'INCOMPLETE')
     
-    spadl_df['result_id'] = result_mapping_series.iloc[:, 0]
-    spadl_df['result_name'] = result_mapping_series.iloc[:, 1]
+    spadl_df['result_id'], spadl_df['result_name'] = _lookup(
+        result_col, result_mapping, {'id': 0, 'name': 'fail'}
+    )
     
     # Mapear partes do corpo
-    bodypart_col = events_df.get('body_part_type', 'foot')
-    bodypart_mapping_series = bodypart_col.apply(lambda x: map_bodypart(x))
-    spadl_df['bodypart_id'] = bodypart_mapping_series.iloc[:, 0]
-    spadl_df['bodypart_name'] = bodypart_mapping_series.iloc[:, 1]
+    if 'body_part_type' in events_df.columns:
+        bodypart_col = events_df['body_part_type'].astype('string').str.lower()
+    else:
+        bodypart_col = pd.Series('foot', index=events_df.index)
+    spadl_df['bodypart_id'], spadl_df['bodypart_name'] = _lookup(
+        bodypart_col, bodypart_mapping, {'id': 0, 'name': 'foot'}
+    )
     
     # action_id sequencial
     spadl_df['action_id'] = range(len(spadl_df))
@@ -0,0 +1,221 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Colunas de y (start_y, end_y_1, ball_y, vy, ...) que trocam de sinal
+# quando o cruzamento vem do outro lado do campo
+MIRROR_PATTERN = r'(^|_)v?y(_\d+)?$'
+
+# Zonas de pitch control definidas para cruzamentos vindos de y positivo
+# (ver utils/pc.py) e cross_region definida pelo end_y (> 3 primeiro pau,
+# < -3 segundo pau): no lado espelhado o primeiro pau vira o segundo
+MIRROR_SWAP = [
+    ('pc_near_post', 'pc_far_post'),
+    ('cross_region_primeiro_pau', 'cross_region_segundo_pau'),
+]
+
+# Mesma troca nas colunas categóricas (antes do one-hot)
+MIRROR_CATEGORIES = {
+    'cross_region': {'primeiro_pau': 'segundo_pau', 'segundo_pau': 'primeiro_pau'},
+}
+
+
+def mirror_plan(columns, negate=None, swap=MIRROR_SWAP) -> dict:
+    """
+    Como espelhar cada coluna de uma matriz de features (reflexão no eixo
+    x, ou seja, y -> -y): um sinal e uma permutação por coluna, aplicados
+    com um único indexador em qualquer lote
+
+    Args:
+        columns (list): Nome das colunas, na ordem da matriz
+        negate (list): Colunas que trocam de sinal (as que casam com
+            MIRROR_PATTERN se None); colunas fora do plano ficam iguais
+        swap (list): Pares de colunas que trocam de lugar
+
+    Returns:
+        dict: 'columns', 'signs' (float, +1/-1) e 'order' (coluna de origem
+              de cada coluna espelhada)
+    """
+    columns = list(columns)
+    if negate is None:
+        negate = [col for col in columns if re.search(MIRROR_PATTERN, col)]
+
+    position = {col: i for i, col in enumerate(columns)}
+    order = np.arange(len(columns))
+    for a, b in swap:
+        if a in position and b in position:
+            order[position[a]], order[position[b]] = position[b], position[a]
+
+    signs = np.ones(len(columns))
+    signs[[position[col] for col in negate if col in position]] = -1.0
+
+    return {'columns': columns, 'signs': signs, 'order': order}
+
+
+def mirror_batch(values, plan: dict, mirrored=None) -> np.ndarray:
+    """
+    Espelha um lote já lido (features no último eixo). Só o lote é copiado:
+    a base (array, memmap) nunca muda.
+
+    Args:
+        values (np.ndarray): Lote (linhas, ..., features)
+        plan (dict): Saída de mirror_plan
+        mirrored (np.ndarray): Linhas espelhadas (bool por linha); todas se None
+
+    Returns:
+        np.ndarray: Novo array com as linhas espelhadas
+    """
+    values = np.asarray(values)
+    flipped = values[..., plan['order']] * plan['signs'].astype(values.dtype, copy=False)
+    if mirrored is None:
+        return flipped
+
+    mirrored = np.asarray(mirrored, dtype=bool).reshape((-1,) + (1,) * (values.ndim - 1))
+    return np.where(mirrored, flipped, values)
+
+
+def mirror_frame(df: pd.DataFrame, negate=None, swap=MIRROR_SWAP, categories=MIRROR_CATEGORIES) -> pd.DataFrame:
+    """
+    Versão espelhada de um DataFrame (ex: um lote de gamestates): colunas
+    numéricas pelo plano e categóricas pelo mapeamento de categories
+    """
+    numeric = df.select_dtypes(include="number").columns
+    plan = mirror_plan(numeric, negate, swap)
+
+    out = df.copy()
+    out[numeric] = mirror_batch(df[numeric].to_numpy(dtype=float), plan)
+
+    for col, mapping in categories.items():
+        if col in out.columns:
+            out[col] = out[col].replace(mapping)
+
+    return out
+
+
+def augmented_rows(n_rows, indices=None):
+    """
+    Linhas virtuais da base aumentada: 0..n-1 são as originais e n..2n-1 as
+    espelhadas, sem materializar nada
+
+    Args:
+        n_rows (int): Linhas da base
+        indices (np.ndarray): Linhas virtuais (todas as 2n se None)
+
+    Returns:
+        tuple: (linha na base, espelhada) de cada linha virtual
+    """
+    indices = np.arange(2 * n_rows) if indices is None else np.asarray(indices, dtype=np.int64)
+    return indices % n_rows, indices >= n_rows
+
+
+def iter_augmented_batches(X, y=None, plan=None, batch_size=256, shuffle=True, seed=42, indices=None):
+    """
+    Lotes da base aumentada com as linhas espelhadas montadas só na hora
+    do lote
+
+    Args:
+        X (np.ndarray ou pd.DataFrame): Base (ex: memmap ou saída de cross_model.transform)
+        y (np.ndarray): Rótulos (o espelho tem o mesmo rótulo)
+        plan (dict): Saída de mirror_plan; obrigatório para arrays, montado
+            pelas colunas de X se for DataFrame
+        batch_size (int): Linhas virtuais por lote
+        shuffle (bool): Embaralha as linhas virtuais
+        seed (int): Semente do embaralhamento
+        indices (np.ndarray): Linhas virtuais usadas (ex: só as de treino)
+
+    Yields:
+        tuple: (X do lote, y do lote ou None, linha na base, espelhada)
+    """
+    if isinstance(X, pd.DataFrame):
+        plan = mirror_plan(X.columns) if plan is None else plan
+        X = X.to_numpy(dtype=float)
+    elif plan is None:
+        raise ValueError("Arrays não têm nomes de colunas: informe plan (ver mirror_plan)")
+    y = None if y is None else np.asarray(y)
+
+    indices = np.arange(2 * len(X)) if indices is None else np.asarray(indices, dtype=np.int64)
+    if shuffle:
+        indices = np.random.default_rng(seed).permutation(indices)
+
+    for start in range(0, len(indices), batch_size):
+        rows, mirrored = augmented_rows(len(X), indices[start:start + batch_size])
+        batch = mirror_batch(X[rows], plan, mirrored)
+        yield batch, (None if y is None else y[rows]), rows, mirrored
+
+
+def augmented_dmatrix(X: pd.DataFrame, y, batch_size=65536, negate=None, swap=MIRROR_SWAP):
+    """
+    QuantileDMatrix do XGBoost com as linhas originais e espelhadas, lida
+    lote a lote por um DataIter: a matriz aumentada em float nunca existe,
+    só os bins quantizados
+
+    Args:
+        X (pd.DataFrame): Features (ex: saída de cross_model.transform)
+        y (np.ndarray): Rótulos
+        batch_size (int): Linhas virtuais por lote
+        negate (list): Colunas que trocam de sinal (ver mirror_plan)
+        swap (list): Pares de colunas que trocam de lugar
+
+    Returns:
+        xgb.QuantileDMatrix: Para xgb.train
+    """
+    import xgboost as xgb
+
+    plan = mirror_plan(X.columns, negate, swap)
+    values = X.to_numpy(dtype=np.float32)
+    y = np.asarray(y)
+
+    class _Batches(xgb.DataIter):
+        def __init__(self):
+            self._start = 0
+            super().__init__()
+
+        def next(self, input_data):
+            if self._start >= 2 * len(values):
+                return False
+            rows, mirrored = augmented_rows(len(values), np.arange(self._start, min(self._start + batch_size, 2 * len(values))))
+            input_data(data=mirror_batch(values[rows], plan, mirrored), label=y[rows], feature_names=plan['columns'])
+            self._start += batch_size
+            return True
+
+        def reset(self):
+            self._start = 0
+
+    return xgb.QuantileDMatrix(_Batches())
+
+
+def compare_mirrored(package: dict, gamestates: pd.DataFrame, batch_size=4096, negate=None, swap=MIRROR_SWAP) -> dict:
+    """
+    Compara as previsões do modelo de cruzamento nos dados originais e
+    espelhados (o espelho é montado por lote)
+
+    Args:
+        package (dict): Pacote de cross_model.fit_cross_model
+        gamestates (pd.DataFrame): Gamestates com cross_success
+
+    Returns:
+        dict: 'mean_abs_diff' entre as probabilidades, 'accuracy' e
+              'accuracy_mirrored' com o threshold do pacote
+    """
+    from .cross_model import TARGET_COLUMN, transform
+
+    model = package['model']
+    X = transform(package, gamestates)
+    plan = mirror_plan(X.columns, negate, swap)
+    values = X.to_numpy(dtype=float)
+
+    proba, proba_mirrored = [], []
+    for start in range(0, len(values), batch_size):
+        batch = values[start:start + batch_size]
+        proba.append(model.predict_proba(pd.DataFrame(batch, columns=X.columns))[:, 1])
+        proba_mirrored.append(model.predict_proba(pd.DataFrame(mirror_batch(batch, plan), columns=X.columns))[:, 1])
+
+    proba, proba_mirrored = np.concatenate(proba), np.concatenate(proba_mirrored)
+    y = gamestates[TARGET_COLUMN].to_numpy(dtype=int)
+
+    return {
+        'mean_abs_diff': float(np.abs(proba - proba_mirrored).mean()),
+        'accuracy': float(((proba >= package['threshold']) == y).mean()),
+        'accuracy_mirrored': float(((proba_mirrored >= package['threshold']) == y).mean()),
+    }
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+
+
+def flatten_forest(model):
+    """
+    Achata as árvores de um RandomForestClassifier treinado em arrays
+    contíguos de nós, para avaliação rápida em lotes pequenos.
+
+    Folhas apontam para elas mesmas (threshold = +inf), assim todas as
+    amostras podem percorrer o mesmo número de níveis sem checar se já
+    chegaram em uma folha.
+
+    Args:
+        model: RandomForestClassifier treinado (ou LazyModel do registry), ou
+            uma saída (vaep.MultiOutputHead) de uma floresta multi-output
+
+    Returns:
+        dict: Arrays 'feature', 'threshold', 'missing_go_to_left',
+              'children', 'value' (proba de cada classe por nó) e 'roots',
+              além de 'depth', 'classes' e 'feature_names'
+    """
+    # Saída de uma floresta multi-output: usa só as probabilidades dessa saída
+    output = None
+    if hasattr(model, "output") and hasattr(model, "model"):
+        model, output = model.model, model.output
+
+    if not hasattr(model, "estimators_"):
+        raise TypeError(f"flatten_forest espera um RandomForestClassifier treinado, não {type(model).__name__}")
+
+    estimators = model.estimators_
+    if output is None:
+        n_classes, classes = model.n_classes_, model.classes_
+    else:
+        n_classes, classes = model.n_classes_[output], model.classes_[output]
+
+    features, thresholds, missing_left, lefts, rights, values, roots = [], [], [], [], [], [], []
+    offset = 0
+    depth = 0
+
+    for estimator in estimators:
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+        node_ids = np.arange(n_nodes)
+        is_leaf = tree.children_left == -1
+
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        missing_left.append(np.asarray(tree.missing_go_to_left, dtype=bool) | is_leaf)
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+
+        # Mesma normalização do DecisionTreeClassifier.predict_proba
+        value = tree.value[:, output or 0, :n_classes].astype(np.float64)
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(value / normalizer)
+
+        roots.append(offset)
+        offset += n_nodes
+        depth = max(depth, tree.max_depth)
+
+    feature_names = getattr(model, "feature_names_in_", None)
+
+    # Os nós são endereçados pelo estado 2 * nó: children[2 * nó] é o filho da
+    # esquerda e children[2 * nó + 1] o da direita (também em estado 2 * nó),
+    # e feature/threshold são repetidos para poder ser indexados pelo estado.
+    # Isso deixa cada nível da descida com uma única soma e quatro gathers.
+    children = 2 * np.column_stack([np.concatenate(lefts), np.concatenate(rights)]).ravel()
+
+    return {
+        'feature': np.repeat(np.concatenate(features), 2).astype(np.intp),
+        'threshold': np.repeat(np.concatenate(thresholds), 2).astype(np.float64),
+        'missing_go_to_left': np.repeat(np.concatenate(missing_left), 2),
+        'children': children.astype(np.intp),
+        'value': np.ascontiguousarray(np.concatenate(values)),
+        'roots': 2 * np.array(roots, dtype=np.intp),
+        'depth': depth,
+        'classes': np.asarray(classes),
+        'feature_names': list(feature_names) if feature_names is not None else None,
+    }
+
+
+def predict_proba(forest, X):
+    """
+    Calcula as probabilidades de cada classe com a floresta achatada,
+    descendo todas as árvores nível a nível de forma vetorizada.
+
+    O resultado é idêntico ao predict_proba do sklearn: X é arredondado para
+    float32 como nas árvores do sklearn e as probabilidades das árvores são
+    somadas na mesma ordem antes de dividir pelo número de árvores.
+
+    Args:
+        forest (dict): Saída de flatten_forest
+        X: DataFrame ou array (n_amostras, n_features)
+
+    Returns:
+        np.ndarray: Array (n_amostras, n_classes)
+    """
+    if isinstance(X, pd.DataFrame) and forest['feature_names'] is not None:
+        if list(X.columns) != forest['feature_names']:
+            X = X[forest['feature_names']]
+    # Arredonda para float32 como o sklearn, mas compara em float64 (a
+    # conversão é exata e evita casts a cada nível da descida)
+    X = np.asarray(X, dtype=np.float32).astype(np.float64)
+    if X.ndim == 1:
+        X = X[np.newaxis, :]
+
+    n_samples, n_features = X.shape
+    X = X.ravel()
+
+    feature = forest['feature']
+    threshold = forest['threshold']
+    children = forest['children']
+    has_missing = np.isnan(X).any()
+
+    # states[t * n_samples + i]: 2 * (nó atual da amostra i na árvore t).
+    # Arrays 1D têm bem menos overhead por operação que arrays 2D pequenos.
+    n_trees = len(forest['roots'])
+    states = np.repeat(forest['roots'], n_samples)
+    if n_samples > 1:
+        row_offset = np.tile(np.arange(n_samples) * n_features, n_trees)
+
+    for _ in range(forest['depth']):
+        feature_idx = feature[states]
+        if n_samples > 1:
+            feature_idx += row_offset
+        x = X[feature_idx]
+        go_right = x > threshold[states]
+        if has_missing:
+            go_right |= np.isnan(x) & ~forest['missing_go_to_left'][states]
+        states = children[states + go_right]
+
+    leaf_values = forest['value'][states // 2].reshape(n_trees, n_samples, -1)
+
+    # Soma ao longo do primeiro eixo é sequencial (árvore por árvore), como no sklearn
+    return leaf_values.sum(axis=0) / n_trees
+
+
+def predict_positive_proba(forest, X):
+    """
+    Probabilidade da classe positiva, equivalente a model.predict_proba(X)[:, 1]
+    """
+    return predict_proba(forest, X)[:, 1]
@@ -0,0 +1,280 @@
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import xgboost as xgb
+from tqdm import tqdm
+
+CROSS_MODEL_PATH = "./models/cross_model.joblib"
+
+# Colunas categóricas com one-hot e colunas que não são features
+CATEGORY_COLUMNS = ['action_1', 'cross_region']
+ID_COLUMNS = ['match_id', 'event_id', 'team_id']
+TARGET_COLUMN = 'cross_success'
+
+# Threshold escolhido no analysis.ipynb
+DEFAULT_THRESHOLD = 0.45
+
+# Parâmetros do modelo final do analysis.ipynb
+CROSS_MODEL_PARAMS = {
+    'n_estimators': 200,
+    'max_depth': 3,
+    'learning_rate': 0.1,
+    'random_state': 42,
+}
+
+
+def fit_vocabulary(gamestates: pd.DataFrame) -> dict:
+    """
+    Vocabulário fixo das colunas categóricas, na mesma ordem das colunas do
+    pd.get_dummies (categorias ordenadas)
+    """
+    return {
+        col: sorted(gamestates[col].dropna().unique().tolist())
+        for col in CATEGORY_COLUMNS
+    }
+
+
+def transform(package: dict, gamestates: pd.DataFrame) -> pd.DataFrame:
+    """
+    Monta a matriz de features com o vocabulário do pacote: as colunas saem
+    sempre na mesma ordem e categorias desconhecidas ficam com tudo zero.
+
+    Args:
+        package (dict): Pacote do modelo (ver fit_cross_model)
+        gamestates (pd.DataFrame): Gamestates de cruzamentos
+
+    Returns:
+        pd.DataFrame: Features na ordem de package['features']
+    """
+    X = gamestates[package['numeric_columns']].astype(float)
+
+    dummies = [X]
+    for col, categories in package['vocabulary'].items():
+        values = pd.Categorical(gamestates[col], categories=categories)
+        dummies.append(pd.get_dummies(values, prefix=col, dtype=float).set_axis(gamestates.index))
+
+    X = pd.concat(dummies, axis=1)
+
+    return X[package['features']]
+
+
+def fit_cross_model(gamestates: pd.DataFrame, features=None, params=None, threshold=DEFAULT_THRESHOLD) -> dict:
+    """
+    Treina o modelo de sucesso do cruzamento e junta no mesmo pacote o
+    vocabulário das categorias, as features, o modelo e o threshold
+
+    Args:
+        gamestates (pd.DataFrame): Gamestates com cross_success
+        features (list): Features usadas (todas se None), ex: a saída de
+            feature_selection.select_features
+        params (dict): Parâmetros do XGBClassifier (sobrescrevem CROSS_MODEL_PARAMS)
+        threshold (float): Threshold de decisão
+
+    Returns:
+        dict: Pacote com 'vocabulary', 'numeric_columns', 'features', 'model' e 'threshold'
+    """
+    numeric_columns = [
+        col for col in gamestates.columns
+        if col not in CATEGORY_COLUMNS + ID_COLUMNS + [TARGET_COLUMN]
+    ]
+    vocabulary = fit_vocabulary(gamestates)
+    all_features = numeric_columns + [
+        f"{col}_{category}" for col, categories in vocabulary.items() for category in categories
+    ]
+
+    package = {
+        'vocabulary': vocabulary,
+        'numeric_columns': numeric_columns,
+        'features': list(features) if features is not None else all_features,
+        'threshold': threshold,
+    }
+
+    X = transform(package, gamestates)
+    y = gamestates[TARGET_COLUMN].astype(int)
+
+    print(f"Treinando modelo de cruzamento com {len(X)} cruzamentos e {X.shape[1]} features...")
+    model = xgb.XGBClassifier(**{**CROSS_MODEL_PARAMS, **(params or {})}, eval_metric="logloss")
+    model.fit(X, y)
+
+    package['model'] = model
+
+    return package
+
+
+def save_cross_model(package: dict, path=CROSS_MODEL_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    joblib.dump(package, path)
+    print(f"Modelo de cruzamento salvo em: {path}")
+    return path
+
+
+def load_cross_model(path=CROSS_MODEL_PATH) -> dict:
+    return joblib.load(path)
+
+
+def predict_proba(package: dict, gamestates: pd.DataFrame) -> np.ndarray:
+    """
+    Probabilidade de sucesso de cada cruzamento
+    """
+    return package['model'].predict_proba(transform(package, gamestates))[:, 1]
+
+
+def predict(package: dict, gamestates: pd.DataFrame) -> np.ndarray:
+    """
+    Classe prevista de cada cruzamento usando o threshold do pacote
+    """
+    return (predict_proba(package, gamestates) >= package['threshold']).astype(int)
+
+
+def predict_contributions(package: dict, gamestates: pd.DataFrame) -> pd.DataFrame:
+    """
+    Valores SHAP (TreeSHAP exato do próprio XGBoost, calculado em paralelo
+    nas linhas) de cada feature para cada cruzamento, na escala de log-odds
+
+    Returns:
+        pd.DataFrame: Colunas 'shap_<feature>' e 'shap_base' (valor esperado)
+    """
+    X = transform(package, gamestates)
+    contributions = package['model'].get_booster().predict(xgb.DMatrix(X), pred_contribs=True)
+
+    columns = [f"shap_{feature}" for feature in package['features']] + ['shap_base']
+
+    return pd.DataFrame(contributions, columns=columns, index=gamestates.index)
+
+
+def score_gamestates(package: dict, source, output_path, batch_size=20, explain=False):
+    """
+    Calcula a probabilidade de sucesso dos cruzamentos de um parquet (arquivo
+    ou diretório particionado) lendo e gravando lotes de partidas, sem
+    carregar tudo em memória. A saída é particionada por match_id, e cada
+    partida pontuada substitui a sua partição anterior.
+
+    Args:
+        package (dict): Pacote do modelo
+        source (str): Parquet ou diretório com os gamestates
+        output_path (str): Diretório de saída
+        batch_size (int): Número de partidas por lote
+        explain (bool): Grava também os valores SHAP de cada cruzamento
+
+    Returns:
+        str: Diretório de saída
+    """
+    dataset = ds.dataset(source, format="parquet", partitioning="hive")
+    match_ids = dataset.to_table(columns=['match_id']).column('match_id').unique().drop_null().to_pylist()
+    match_ids = sorted(match_ids)
+
+    print(f"Pontuando cruzamentos de {len(match_ids)} partidas...")
+
+    n_crosses = 0
+    for i in tqdm(range(0, len(match_ids), batch_size), desc="Partidas"):
+        batch_ids = match_ids[i:i + batch_size]
+        gamestates = dataset.to_table(filter=ds.field('match_id').isin(batch_ids)).to_pandas()
+
+        proba = predict_proba(package, gamestates)
+        out = pd.DataFrame({
+            'match_id': gamestates['match_id'].astype('int64'),
+            'event_id': gamestates['event_id'].astype('int64'),
+            'cross_success_proba': proba,
+            'cross_success_pred': (proba >= package['threshold']).astype(int),
+        })
+        if explain:
+            out = pd.concat([out, predict_contributions(package, gamestates)], axis=1)
+
+        pq.write_to_dataset(
+            pa.Table.from_pandas(out, preserve_index=False),
+            output_path,
+            partition_cols=['match_id'],
+            existing_data_behavior='delete_matching',
+        )
+        n_crosses += len(out)
+
+    print(f"Probabilidades de {n_crosses} cruzamentos salvas em: {output_path}")
+
+    return output_path
+
+
+def read_scores(path, event_ids=None, match_ids=None, columns=None) -> pd.DataFrame:
+    """
+    Lê as probabilidades (e valores SHAP, se gravados) da saída de
+    score_gamestates, filtrando por event_id e/ou match_id sem ler o resto
+
+    Returns:
+        pd.DataFrame: Linhas indexadas por event_id
+    """
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+
+    expression = None
+    if event_ids is not None:
+        expression = ds.field('event_id').isin(list(event_ids))
+    if match_ids is not None:
+        match_filter = ds.field('match_id').isin(list(match_ids))
+        expression = match_filter if expression is None else expression & match_filter
+
+    scores = dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+    return scores.set_index('event_id') if 'event_id' in scores.columns else scores
+
+
+def explain_cross(path, event_id, top=10) -> pd.DataFrame:
+    """
+    Explicação gravada de um cruzamento: as features com maior contribuição
+    (em módulo) para a probabilidade prevista
+
+    Returns:
+        pd.DataFrame: Colunas 'feature' e 'shap', ordenadas por |shap|
+    """
+    row = read_scores(path, event_ids=[event_id])
+    if row.empty:
+        raise KeyError(f"Cruzamento {event_id} não encontrado em {path}")
+
+    row = row.iloc[0]
+    shap_columns = [col for col in row.index if col.startswith("shap_") and col != 'shap_base']
+    if not shap_columns:
+        raise ValueError(f"{path} não tem valores SHAP (use score_gamestates com explain=True)")
+
+    contributions = pd.DataFrame({
+        'feature': [col[len("shap_"):] for col in shap_columns],
+        'shap': row[shap_columns].to_numpy(dtype=float),
+    })
+    contributions = contributions.reindex(contributions['shap'].abs().sort_values(ascending=False).index)
+
+    return contributions.head(top).reset_index(drop=True)
+
+
+def shap_summary(path, event_ids=None, batch_size=65536) -> pd.DataFrame:
+    """
+    Importância global a partir dos valores SHAP gravados: média de |shap| e
+    média do shap de cada feature, lendo o parquet em lotes
+
+    Args:
+        path (str): Saída de score_gamestates com explain=True
+        event_ids (list): Restringe a um subconjunto (ex: falsos negativos)
+        batch_size (int): Linhas lidas por lote
+
+    Returns:
+        pd.DataFrame: Colunas 'mean_abs_shap' e 'mean_shap', ordenado pela primeira
+    """
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    shap_columns = [name for name in dataset.schema.names if name.startswith("shap_") and name != 'shap_base']
+    expression = ds.field('event_id').isin(list(event_ids)) if event_ids is not None else None
+
+    abs_sum = np.zeros(len(shap_columns))
+    total = np.zeros(len(shap_columns))
+    n = 0
+    for batch in dataset.to_batches(columns=shap_columns, filter=expression, batch_size=batch_size):
+        values = batch.to_pandas().to_numpy(dtype=float)
+        abs_sum += np.abs(values).sum(axis=0)
+        total += values.sum(axis=0)
+        n += len(values)
+
+    summary = pd.DataFrame({
+        'mean_abs_shap': abs_sum / max(n, 1),
+        'mean_shap': total / max(n, 1),
+    }, index=[col[len("shap_"):] for col in shap_columns])
+
+    return summary.sort_values('mean_abs_shap', ascending=False)
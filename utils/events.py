@@ -1,4 +1,5 @@
 import ast
+import numpy as np
 import pandas as pd
 
 def _read_roster() -> pd.DataFrame:
@@ -92,79 +93,116 @@ def read_events() -> pd.DataFrame:
     return events_df
 
 
-def map_event_to_vaep_action(row):
-    event_type = row['event_type'] if not pd.isna(row['event_type']) else "NA"
-    pass_type = row['pass_type']if not pd.isna(row['pass_type']) else "NA"
-    set_piece_type = row['set_piece_type'] if not pd.isna(row['set_piece_type']) else "NA"
-    duel_type = row['duel_type'] if not pd.isna(row['duel_type']) else "NA"
-
+# Regras de mapeamento evento -> ação VAEP, avaliadas em ordem (a primeira que
+# casar define o rótulo). Cada regra é (event_type, pass_type, set_piece_type,
+# duel_type, rótulo); None casa com qualquer valor e uma tupla com qualquer um
+# dos valores listados. Campos ausentes são tratados como "NA".
+VAEP_ACTION_RULES = [
     # --------- Passes e jogadas de bola parada -----------
-    if event_type == 'PASS':
-        if pass_type == 'CROSS':
-            return 'cross'
-        elif set_piece_type == 'CORNER_KICK':
-            if pass_type == 'CROSS':
-                return 'crossed_corner'
-            else:
-                return 'short_corner'
-        elif set_piece_type == 'FREE_KICK':
-            if pass_type == 'CROSS':
-                return 'crossed_freekick'
-            else:
-                return 'short_freekick'
-        elif set_piece_type == 'THROW_IN':
-            return 'throw_in'
-        else:
-            return 'pass'
+    ('PASS', 'CROSS', None, None, 'cross'),
+    ('PASS', None, 'CORNER_KICK', None, 'short_corner'),
+    ('PASS', None, 'FREE_KICK', None, 'short_freekick'),
+    ('PASS', None, 'THROW_IN', None, 'throw_in'),
+    ('PASS', None, None, None, 'pass'),
 
     # --------- Carregada (Carry / Dribble) -----------
-    elif event_type == 'CARRY':
-        return 'dribble'
+    ('CARRY', None, None, None, 'dribble'),
 
     # --------- Take On -----------
-    elif event_type == 'TAKE_ON':
-        return 'take_on'
+    ('TAKE_ON', None, None, None, 'take_on'),
 
     # --------- Faltas -----------
-    elif event_type == 'FOUL_COMMITTED':
-        return 'foul'
+    ('FOUL_COMMITTED', None, None, None, 'foul'),
 
     # --------- Duels (Tackle, Bad touch, Interception) -----------
-    elif event_type == 'DUEL':
-        if duel_type in ['SLIDING_TACKLE', 'GROUND']:
-            return 'tackle'
-        elif duel_type == 'LOOSE_BALL':
-            return 'interception'
-        elif duel_type == 'AERIAL':
-            return 'tackle'  # ou outro, dependendo de como você quiser tratar
+    ('DUEL', None, None, ('SLIDING_TACKLE', 'GROUND'), 'tackle'),
+    ('DUEL', None, None, 'LOOSE_BALL', 'interception'),
+    ('DUEL', None, None, 'AERIAL', 'tackle'),  # ou outro, dependendo de como você quiser tratar
 
     # --------- Limpeza (Clearance) -----------
-    elif event_type == 'CLEARANCE':
-        return 'clearance'
+    ('CLEARANCE', None, None, None, 'clearance'),
 
     # --------- Finalizações -----------
-    elif event_type == 'SHOT':
-        if set_piece_type == 'PENALTY':
-            return 'penalty_shot'
-        elif set_piece_type == 'FREE_KICK':
-            return 'freekick_shot'
-        else:
-            return 'shot'
+    ('SHOT', None, 'PENALTY', None, 'penalty_shot'),
+    ('SHOT', None, 'FREE_KICK', None, 'freekick_shot'),
+    ('SHOT', None, None, None, 'shot'),
 
     # --------- Goleiro -----------
-    elif event_type == 'GOALKEEPER':
-        # Aqui você pode ter campos adicionais para distinguir tipos de ações de goleiro
-        # Exemplo genérico:
-        return 'keeper_save'
+    ('GOALKEEPER', None, None, None, 'keeper_save'),
+]
+
+VAEP_ACTION_RULE_COLUMNS = ['event_type', 'pass_type', 'set_piece_type', 'duel_type']
+
+# Rótulo para eventos que não casam com nenhuma regra (serão ignorados)
+VAEP_NON_ACTION = 'non_action'
+
+
+def _rule_matches(value, rule_value):
+    if rule_value is None:
+        return True
+    if isinstance(rule_value, tuple):
+        return value in rule_value
+    return value == rule_value
+
+
+def map_event_to_vaep_action(row):
+    values = [row[col] if not pd.isna(row[col]) else "NA" for col in VAEP_ACTION_RULE_COLUMNS]
+
+    for *rule_values, label in VAEP_ACTION_RULES:
+        if all(_rule_matches(v, r) for v, r in zip(values, rule_values)):
+            return label
+
+    return VAEP_NON_ACTION
+
+
+def map_events_to_vaep_actions(events: pd.DataFrame, upper: bool = False) -> pd.Series:
+    """
+    Versão vetorizada de map_event_to_vaep_action para um DataFrame inteiro.
+
+    Cada coluna de VAEP_ACTION_RULE_COLUMNS é fatorada em códigos inteiros (NA
+    vira -1, que nunca casa com uma regra) e as regras são avaliadas como
+    comparações entre códigos com np.select.
+
+    Args:
+        events (pd.DataFrame): Eventos com as colunas de VAEP_ACTION_RULE_COLUMNS
+        upper (bool): Se True, retorna os rótulos em maiúsculas
+
+    Returns:
+        pd.Series: Rótulo VAEP de cada evento, com o mesmo índice de events
+    """
+    codes = {}
+    categories = {}
+    for col in VAEP_ACTION_RULE_COLUMNS:
+        codes[col], categories[col] = pd.factorize(events[col])
+        categories[col] = pd.Index(categories[col])
+
+    def condition(col, rule_value):
+        # Tabela booleana por categoria; a última posição (código -1) é NA
+        lookup = np.zeros(len(categories[col]) + 1, dtype=bool)
+        rule_values = rule_value if isinstance(rule_value, tuple) else (rule_value,)
+        lookup[[categories[col].get_loc(v) for v in rule_values if v in categories[col]]] = True
+        return lookup[codes[col]]
+
+    conditions = []
+    for *rule_values, _ in VAEP_ACTION_RULES:
+        cond = np.ones(len(events), dtype=bool)
+        for col, rule_value in zip(VAEP_ACTION_RULE_COLUMNS, rule_values):
+            if rule_value is not None:
+                cond &= condition(col, rule_value)
+        conditions.append(cond)
+
+    labels = np.array([label for *_, label in VAEP_ACTION_RULES] + [VAEP_NON_ACTION], dtype=object)
+    if upper:
+        labels = np.array([label.upper() for label in labels], dtype=object)
+
+    rule_idx = np.select(conditions, np.arange(len(VAEP_ACTION_RULES)), default=len(VAEP_ACTION_RULES))
 
-    # --------- Outros -----------
-    else:
-        return 'non_action'  # Ou outro rótulo para eventos que você vai ignorar
+    return pd.Series(labels[rule_idx], index=events.index)
 
 
 def read_actions():
     actions = read_events()
-    actions["action_type"] = actions.apply((lambda x: map_event_to_vaep_action(x).upper()), axis=1)
+    actions["action_type"] = map_events_to_vaep_actions(actions, upper=True)
 
     return actions
 
@@ -0,0 +1,247 @@
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+EXPORT_PATH = "./data/exports/"
+EXPORT_FORMATS = ("png", "gif", "mp4")
+FRAME_RATE = 25
+
+# Margem de frames lida em volta de cada janela para a suavização da
+# velocidade (window_size de calculate_smoothed_velocity)
+VELOCITY_MARGIN = 8
+
+# Renderizador de cada processo do pool (o campo é desenhado uma vez por processo)
+_renderer = None
+
+
+def _init_worker(renderer_kwargs):
+    global _renderer
+
+    import matplotlib
+    matplotlib.use("Agg")
+
+    from .plot import PitchRenderer
+    _renderer = PitchRenderer(**renderer_kwargs)
+
+
+def cross_windows(tracking_df: pd.DataFrame, crosses: pd.DataFrame, window=0) -> dict:
+    """
+    Frames de tracking em volta de cada cruzamento, padronizados como em
+    standardize_crossings_direction: o lado do campo é decidido pela posição
+    do cruzador no frame do cruzamento e aplicado à janela inteira
+
+    Args:
+        tracking_df (pd.DataFrame): Tracking da partida com velocidades (vx, vy)
+        crosses (pd.DataFrame): Cruzamentos da partida (event_id, team_id, player_jersey_num)
+        window (int): Frames antes e depois do frame do cruzamento
+
+    Returns:
+        dict: event_id -> (frame do cruzamento, DataFrame com os frames da janela)
+    """
+    from tracking.windows import extract_windows
+
+    is_cross = tracking_df["possession_event_id"].isin(crosses["event_id"].tolist())
+    cross_frames = tracking_df[is_cross].groupby("possession_event_id")["frame_num"].min()
+
+    df = extract_windows(
+        tracking_df, cross_frames.to_numpy(), window, window, frame_column="frame_num",
+        ids=cross_frames.index.to_numpy(), id_column="cross_event_id",
+    )
+
+    windows = {}
+    for cross in crosses.itertuples(index=False):
+        if cross.event_id not in cross_frames.index:
+            continue
+
+        cross_df = df[df["cross_event_id"] == cross.event_id].sort_values("frame_num", kind="stable")
+
+        player = cross_df[
+            (cross_df["window_offset"] == 0) &
+            (cross_df["jersey_number"] == cross.player_jersey_num) &
+            (cross_df["team_id"] == cross.team_id)
+        ]
+        if not player.empty:
+            if player["x"].iloc[0] < 0:
+                cross_df[["x", "vx"]] *= -1
+            if player["y"].iloc[0] < 0:
+                cross_df[["y", "vy"]] *= -1
+
+        windows[cross.event_id] = (cross_frames[cross.event_id], cross_df)
+
+    return windows
+
+
+def _velocity_frames(tracking_df, crosses, window):
+    """
+    Restringe o tracking às janelas dos cruzamentos (com margem) antes de
+    calcular a velocidade, em vez de suavizar a partida inteira
+    """
+    from tracking.windows import assign_windows
+
+    cross_frames = tracking_df.loc[
+        tracking_df["possession_event_id"].isin(crosses["event_id"].tolist()), "frame_num"
+    ].unique()
+
+    margin = window + VELOCITY_MARGIN
+    keep = assign_windows(tracking_df["frame_num"].to_numpy(), cross_frames, margin, margin) >= 0
+
+    return tracking_df[keep]
+
+
+def _write_gif(frames, path, fps):
+    """
+    Grava o GIF frame a frame: a paleta vem do primeiro frame e cada frame
+    é quantizado e escrito assim que é renderizado
+    """
+    from PIL import GifImagePlugin, Image
+
+    duration = int(1000 / fps)
+    palette = None
+
+    with open(path, "wb") as file:
+        for frame in frames:
+            image = Image.fromarray(np.ascontiguousarray(frame[..., :3]))
+            if palette is None:
+                palette = image.quantize(colors=256)
+                header, _ = GifImagePlugin.getheader(palette.copy(), info={'loop': 0, 'duration': duration, 'optimize': False})
+                file.write(b"".join(header))
+
+            for chunk in GifImagePlugin.getdata(image.quantize(palette=palette), duration=duration):
+                file.write(chunk)
+
+        file.write(b";")
+
+
+def _write_mp4(frames, path, fps):
+    """
+    Manda cada frame para o stdin do ffmpeg assim que é renderizado
+    """
+    import matplotlib
+
+    ffmpeg = shutil.which(matplotlib.rcParams["animation.ffmpeg_path"])
+    process = None
+
+    for frame in frames:
+        if process is None:
+            height, width = frame.shape[:2]
+            command = [
+                ffmpeg, "-y", "-loglevel", "error",
+                "-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+                "-vcodec", "libx264", "-pix_fmt", "yuv420p", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+                path,
+            ]
+            process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        process.stdin.write(frame.tobytes())
+
+    if process is None:
+        return
+
+    process.stdin.close()
+    if process.wait() != 0:
+        raise RuntimeError(f"ffmpeg falhou ao gravar {path}")
+
+
+def _export_match(match_id, crosses, output_dir, fmt, window, fps):
+    """
+    Exporta os cruzamentos de uma partida (roda em um processo do pool)
+    """
+    from tracking.process import _calculate_smoothed_velocity
+    from tracking.read import read_by_match_id
+
+    tracking_df = read_by_match_id(match_id)
+    tracking_df = _velocity_frames(tracking_df, crosses, window)
+    tracking_df = _calculate_smoothed_velocity(tracking_df)
+
+    windows = cross_windows(tracking_df, crosses, window if fmt != "png" else 0)
+    team_ids = dict(zip(crosses["event_id"], zip(crosses["team_id"], crosses["player_jersey_num"])))
+
+    paths = {}
+    for event_id, (cross_frame, df) in windows.items():
+        path = os.path.join(output_dir, f"{event_id}.{fmt}")
+        highlight = team_ids[event_id]
+
+        if fmt == "png":
+            _renderer.render(df, highlight=highlight).save(path)
+        else:
+            bounds = np.flatnonzero(np.diff(df["frame_num"].to_numpy())) + 1
+            starts, ends = np.r_[0, bounds], np.r_[bounds, len(df)]
+            # Gerador: só o frame atual fica em memória
+            frames = (
+                _renderer.render(df.iloc[start:end], highlight=highlight).to_array()
+                for start, end in zip(starts, ends)
+            )
+            if fmt == "gif":
+                _write_gif(frames, path, fps)
+            else:
+                _write_mp4(frames, path, fps)
+
+        paths[event_id] = path
+
+    return paths
+
+
+def export_crosses(event_ids, actions=None, output_dir=EXPORT_PATH, fmt="png", window=25, fps=FRAME_RATE,
+                   n_jobs=-1, renderer_kwargs=None) -> dict:
+    """
+    Exporta imagens (PNG do frame do cruzamento) ou animações (GIF/MP4 da
+    janela de ±window frames) de uma lista de cruzamentos, a partir do
+    tracking padronizado. As partidas são divididas entre processos com o
+    backend Agg, e cada partida tem o tracking lido uma única vez.
+
+    Args:
+        event_ids (list): event_ids dos cruzamentos
+        actions (pd.DataFrame): Saída de read_actions (lida se None)
+        output_dir (str): Diretório de saída (um arquivo <event_id>.<fmt> por cruzamento)
+        fmt (str): "png", "gif" ou "mp4" (precisa do ffmpeg)
+        window (int): Frames antes e depois do cruzamento nas animações
+        fps (int): Frames por segundo das animações
+        n_jobs (int): Número de processos (-1 para todos os núcleos)
+        renderer_kwargs (dict): Argumentos do PitchRenderer (ex: figsize, dpi)
+
+    Returns:
+        dict: event_id -> caminho do arquivo gerado
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato inválido: {fmt} (use um de {EXPORT_FORMATS})")
+
+    if fmt == "mp4":
+        import matplotlib
+        if shutil.which(matplotlib.rcParams["animation.ffmpeg_path"]) is None:
+            raise RuntimeError("ffmpeg não encontrado: use fmt='gif' ou instale o ffmpeg")
+
+    if actions is None:
+        from .events import read_actions
+        actions = read_actions()
+
+    columns = ["match_id", "event_id", "team_id", "player_jersey_num"]
+    crosses = actions.loc[actions["event_id"].isin(list(event_ids)), columns].dropna().astype("int64")
+
+    missing = set(event_ids) - set(crosses["event_id"])
+    if missing:
+        print(f"{len(missing)} event_ids não encontrados nas ações (ou sem camisa do cruzador)")
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+    matches = list(crosses.groupby("match_id"))
+
+    print(f"Exportando {len(crosses)} cruzamentos de {len(matches)} partidas ({fmt})...")
+
+    paths = {}
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                             initargs=(renderer_kwargs or {},)) as executor:
+        futures = [
+            executor.submit(_export_match, match_id, match_crosses, output_dir, fmt, window, fps)
+            for match_id, match_crosses in matches
+        ]
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Partidas"):
+            paths.update(future.result())
+
+    print(f"{len(paths)} arquivos salvos em: {output_dir}")
+
+    return paths
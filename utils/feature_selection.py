@@ -0,0 +1,135 @@
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from tqdm import tqdm
+
+from .search import XGB_BASE_PARAMS, _custom_metric, _score, build_folds, fold_splits
+
+# Parâmetros do XGBClassifier do RFECV do analysis.ipynb
+SELECTION_PARAMS = {
+    'max_depth': 6,
+    'learning_rate': 0.3,
+}
+
+
+def _fit_fold(params, fold, num_boost_round, early_stopping_rounds, scoring):
+    booster = xgb.train(
+        params,
+        fold['dtrain'],
+        num_boost_round=num_boost_round,
+        evals=[(fold['dvalid'], 'valid')],
+        custom_metric=_custom_metric(scoring),
+        maximize=True,
+        early_stopping_rounds=early_stopping_rounds,
+        verbose_eval=False,
+    )
+    n_rounds = booster.best_iteration + 1 if early_stopping_rounds else booster.num_boosted_rounds()
+    proba = booster.predict(fold['dvalid'], iteration_range=(0, n_rounds))
+
+    return _score(fold['y_valid'], proba, scoring), n_rounds, booster.get_score(importance_type='gain')
+
+
+def select_features(X, y, groups=None, params=None, n_splits=5, step=0.2, min_features=1, scoring="f1",
+                    patience=3, tol=1e-3, num_boost_round=100, early_stopping_rounds=None,
+                    n_jobs=-1, random_state=42):
+    """
+    Seleção de features por eliminação recursiva guiada pela importância
+    (gain) do XGBoost, como o RFECV do analysis.ipynb, mas removendo várias
+    features por rodada
+
+    Os folds são sorteados uma única vez e reaproveitados em todas as rodadas.
+    Com early_stopping_rounds, cada rodada treina no máximo o dobro de rodadas
+    de boosting que a rodada anterior precisou (o XGBoost não continua um
+    booster com outro conjunto de features, então esse é o aproveitamento
+    possível), e o early stopping acompanha o próprio scoring. Por padrão
+    treina as num_boost_round rodadas, como o RFECV. A busca para
+    quando o score da validação cruzada não melhora por `patience` rodadas
+    seguidas.
+
+    Args:
+        X (pd.DataFrame): Features
+        y (pd.Series): Labels
+        groups (np.ndarray): Grupos para a validação cruzada (ex: match_id)
+        params (dict): Parâmetros do XGBoost (sobrescrevem SELECTION_PARAMS)
+        n_splits (int): Número de folds
+        step (float ou int): Fração (< 1) ou número de features removidas por rodada
+        min_features (int): Número mínimo de features
+        scoring (str): "f1" ou "roc_auc"
+        patience (int): Rodadas sem melhora antes de parar
+        tol (float): Melhora mínima do score para zerar a paciência
+        num_boost_round (int): Máximo de rodadas de boosting
+        early_stopping_rounds (int): Rodadas sem melhora antes de parar o
+            boosting (None para treinar todas as rodadas)
+        n_jobs (int): Número de folds treinados em paralelo
+        random_state (int): Seed da divisão dos folds
+
+    Returns:
+        dict: 'selected_features', 'best_score' e 'history' (DataFrame com o
+              score e as features de cada rodada)
+    """
+    y = np.asarray(y)
+    splits = fold_splits(y, groups, n_splits, random_state)
+
+    n_cores = joblib.cpu_count() + 1 + n_jobs if n_jobs < 0 else n_jobs
+    n_parallel = max(1, min(n_cores, n_splits))
+    params = {**XGB_BASE_PARAMS, **SELECTION_PARAMS, **(params or {}), 'nthread': max(1, n_cores // n_parallel)}
+
+    features = list(X.columns)
+    history = []
+    best_score, rounds_without_improvement = -np.inf, 0
+    max_rounds = num_boost_round
+
+    with joblib.Parallel(n_jobs=n_parallel, prefer="threads") as parallel, tqdm(desc="Seleção de features") as pbar:
+        while True:
+            folds = build_folds(X[features], y, splits=splits)
+            fitted = parallel(
+                joblib.delayed(_fit_fold)(params, fold, max_rounds, early_stopping_rounds, scoring)
+                for fold in folds
+            )
+
+            scores, n_rounds, gains = zip(*fitted)
+            score = float(np.mean(scores))
+            importance = pd.DataFrame(list(gains), columns=features).fillna(0).mean()
+
+            history.append({
+                'n_features': len(features),
+                'score': score,
+                'n_rounds': int(np.mean(n_rounds)),
+                'features': list(features),
+            })
+            pbar.update(1)
+            pbar.set_postfix(n_features=len(features), score=f"{score:.4f}")
+
+            if score > best_score + tol:
+                best_score, rounds_without_improvement = score, 0
+            else:
+                best_score = max(best_score, score)
+                rounds_without_improvement += 1
+
+            if rounds_without_improvement >= patience or len(features) <= min_features:
+                break
+
+            n_drop = max(1, int(len(features) * step)) if step < 1 else int(step)
+            n_drop = min(n_drop, len(features) - min_features)
+
+            # Remove as features menos importantes (as sem nenhum split primeiro)
+            dropped = set(importance.sort_values(kind="stable").index[:n_drop])
+            features = [feature for feature in features if feature not in dropped]
+
+            if early_stopping_rounds:
+                max_rounds = min(num_boost_round, 2 * max(n_rounds) + early_stopping_rounds)
+
+    history = pd.DataFrame(history)
+
+    # Melhor score; em caso de empate, o menor conjunto (como o RFECV)
+    best = history.sort_values(['score', 'n_features'], ascending=[False, True]).iloc[0]
+
+    print(f"Features selecionadas ({best['n_features']}): {best['features']}")
+    print(f"Melhor {scoring}: {best['score']:.4f}")
+
+    return {
+        'selected_features': best['features'],
+        'best_score': float(best['score']),
+        'history': history,
+    }
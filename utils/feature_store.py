@@ -0,0 +1,118 @@
+import hashlib
+import os
+
+import pandas as pd
+from tqdm import tqdm
+
+import socceraction.vaep.features as fs
+
+FEATURE_STORE_PATH = "./data/features/"
+
+# Funções de features usadas no treino e na valoração do VAEP
+XFNS = [
+    fs.actiontype_onehot,
+    fs.bodypart_onehot,
+    fs.result_onehot,
+    fs.goalscore,
+    fs.startlocation,
+    fs.endlocation,
+    fs.movement,
+    fs.space_delta,
+    fs.startpolar,
+    fs.endpolar,
+    fs.team,
+    fs.time_delta
+]
+
+
+def feature_key(game_actions: pd.DataFrame, xfns=XFNS, nb_prev_actions=3) -> str:
+    """
+    Gera a chave de cache das features de um jogo: um hash do conteúdo das
+    ações e da lista de funções de features. Se qualquer um dos dois mudar, a
+    chave muda e as features são recalculadas.
+    """
+    h = hashlib.sha1()
+    h.update(pd.util.hash_pandas_object(game_actions, index=False).to_numpy().tobytes())
+    h.update(",".join(map(str, game_actions.columns)).encode())
+    h.update(",".join(f"{fn.__module__}.{fn.__qualname__}" for fn in xfns).encode())
+    h.update(str(nb_prev_actions).encode())
+
+    return h.hexdigest()[:16]
+
+
+def compute_game_features(game_actions: pd.DataFrame, xfns=XFNS, nb_prev_actions=3) -> pd.DataFrame:
+    """
+    Calcula a matriz de features X de um jogo
+
+    O mandante é lido de cada ação, então também é possível passar ações de
+    vários jogos de uma vez (o game state não cruza jogos nem períodos).
+
+    Args:
+        game_actions (pd.DataFrame): Ações SPADL de um jogo (com home_team_id)
+        xfns (list): Funções de features do socceraction
+        nb_prev_actions (int): Número de ações no game state
+
+    Returns:
+        pd.DataFrame: Features com o mesmo índice de game_actions
+    """
+    home_team_id = game_actions["home_team_id"].to_numpy()
+
+    # play_left_to_right altera os DataFrames do game state no lugar
+    gamestates = fs.gamestates(game_actions.copy(), nb_prev_actions=nb_prev_actions)
+    gamestates = fs.play_left_to_right(gamestates, home_team_id)
+
+    return pd.concat([fn(gamestates) for fn in xfns], axis=1)
+
+
+def get_game_features(game_actions: pd.DataFrame, xfns=XFNS, nb_prev_actions=3, store_path=FEATURE_STORE_PATH) -> pd.DataFrame:
+    """
+    Retorna a matriz de features de um jogo, lendo do feature store se ela já
+    tiver sido calculada ou calculando e salvando em parquet caso contrário.
+
+    Args:
+        game_actions (pd.DataFrame): Ações SPADL de um jogo
+        xfns (list): Funções de features do socceraction
+        nb_prev_actions (int): Número de ações no game state
+        store_path (str): Diretório do feature store
+
+    Returns:
+        pd.DataFrame: Features com o mesmo índice de game_actions
+    """
+    game_id = game_actions.iloc[0]["game_id"]
+    key = feature_key(game_actions, xfns, nb_prev_actions)
+    path = os.path.join(store_path, f"{game_id}_{key}.parquet")
+
+    if os.path.exists(path):
+        X = pd.read_parquet(path)
+    else:
+        X = compute_game_features(game_actions, xfns, nb_prev_actions)
+        os.makedirs(store_path, exist_ok=True)
+        X.reset_index(drop=True).to_parquet(path)
+
+    X.index = game_actions.index
+
+    return X
+
+
+def get_features(actions: pd.DataFrame, xfns=XFNS, nb_prev_actions=3, store_path=FEATURE_STORE_PATH) -> pd.DataFrame:
+    """
+    Retorna a matriz de features de todas as ações, jogo a jogo, usando o
+    feature store compartilhado entre treino, avaliação e valoração.
+
+    Args:
+        actions (pd.DataFrame): Ações SPADL de um ou mais jogos
+        xfns (list): Funções de features do socceraction
+        nb_prev_actions (int): Número de ações no game state
+        store_path (str): Diretório do feature store
+
+    Returns:
+        pd.DataFrame: Features alinhadas com o índice de actions
+    """
+    games = actions.groupby("game_id", sort=False)
+
+    X = pd.concat([
+        get_game_features(game_actions, xfns, nb_prev_actions, store_path)
+        for _, game_actions in tqdm(games, total=games.ngroups, desc="Features")
+    ])
+
+    return X.reindex(actions.index)
@@ -0,0 +1,279 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+GRIDS_PATH = "./data/grids/"
+
+# Mesma grade do bin_statistic do exploring-model.ipynb (30 x 20 sobre o
+# campo de 105 x 68), em coordenadas centradas como nos gamestates
+GRID_BINS = (30, 20)
+GRID_RANGE = ((-105 / 2, 105 / 2), (-68 / 2, 68 / 2))
+
+GRID_KEYS = ['team_id', 'cross_region', 'season']
+GRID_POINTS = ('start', 'end')
+GRID_STATISTICS = ('count', 'success_rate', 'mean_vaep')
+
+
+def _edges(bins, range):
+    (xmin, xmax), (ymin, ymax) = range
+    return np.linspace(xmin, xmax, bins[0] + 1), np.linspace(ymin, ymax, bins[1] + 1)
+
+
+def _grid_file(path):
+    return os.path.join(path, "grids.npz")
+
+
+def load_grids(path=GRIDS_PATH):
+    """
+    Lê o store de grades
+
+    Returns:
+        dict: 'keys' (DataFrame com GRID_KEYS, uma linha por grupo), 'bins',
+              'range', 'game_ids' e as somas 'count', 'success', 'vaep_sum' e
+              'vaep_count', com formato (grupos, pontos, bins_x, bins_y).
+              None se o store não existir.
+    """
+    grid_file = _grid_file(path)
+    if not os.path.exists(grid_file):
+        return None
+
+    with np.load(grid_file) as data:
+        grids = {name: data[name] for name in data.files}
+
+    grids['keys'] = pd.DataFrame({key: grids.pop(key) for key in GRID_KEYS})
+    grids['bins'] = tuple(grids['bins'].tolist())
+    grids['range'] = tuple(map(tuple, grids['range'].tolist()))
+    grids['game_ids'] = grids['game_ids'].tolist()
+
+    return grids
+
+
+def _save_grids(grids, path):
+    os.makedirs(path, exist_ok=True)
+
+    arrays = {key: grids['keys'][key].to_numpy() for key in GRID_KEYS}
+    arrays['team_id'] = arrays['team_id'].astype(np.int64)
+    arrays['cross_region'] = arrays['cross_region'].astype(str)
+    arrays['season'] = arrays['season'].astype(str)
+
+    # Grades quase todas zeradas: comprimidas ficam com poucos KB
+    np.savez_compressed(
+        _grid_file(path),
+        bins=np.asarray(grids['bins']),
+        range=np.asarray(grids['range']),
+        game_ids=np.asarray(grids['game_ids'], dtype=np.int64),
+        count=grids['count'],
+        success=grids['success'],
+        vaep_sum=grids['vaep_sum'],
+        vaep_count=grids['vaep_count'],
+        **arrays,
+    )
+
+
+def _empty_grids(n_groups, bins):
+    shape = (n_groups, len(GRID_POINTS)) + tuple(bins)
+    return {
+        'count': np.zeros(shape, dtype=np.int64),
+        'success': np.zeros(shape, dtype=np.int64),
+        'vaep_sum': np.zeros(shape, dtype=np.float64),
+        'vaep_count': np.zeros(shape, dtype=np.int64),
+    }
+
+
+def compute_grids(gamestates: pd.DataFrame, keys: pd.DataFrame, bins=GRID_BINS, range=GRID_RANGE) -> dict:
+    """
+    Conta cruzamentos, sucessos e VAEP em cada célula da grade, para início
+    e fim do cruzamento e para cada grupo, em uma única passada vetorizada
+    (um np.bincount sobre o índice achatado grupo/ponto/célula)
+
+    Args:
+        gamestates (pd.DataFrame): Gamestates com GRID_KEYS, start/end x/y,
+            cross_success e, opcionalmente, vaep_value
+        keys (pd.DataFrame): Grupos (GRID_KEYS); gamestates de grupos fora
+            dessa tabela são ignorados
+        bins (tuple): Número de células em x e y
+        range (tuple): Limites ((xmin, xmax), (ymin, ymax)); pontos fora ficam de fora
+
+    Returns:
+        dict: 'count', 'success', 'vaep_sum' e 'vaep_count' com formato
+              (grupos, pontos, bins_x, bins_y)
+    """
+    nx, ny = bins
+    (xmin, xmax), (ymin, ymax) = range
+    n_groups = len(keys)
+    x_edges, y_edges = _edges(bins, range)
+
+    # Grupo de cada gamestate (posição em keys)
+    index = pd.MultiIndex.from_frame(keys[GRID_KEYS])
+    group = index.get_indexer(pd.MultiIndex.from_frame(gamestates[GRID_KEYS]))
+
+    success = gamestates['cross_success'].to_numpy(dtype=np.int64)
+    if 'vaep_value' in gamestates.columns:
+        vaep = gamestates['vaep_value'].to_numpy(dtype=np.float64)
+    else:
+        vaep = np.full(len(gamestates), np.nan)
+    has_vaep = ~np.isnan(vaep)
+
+    flat, weights_success, weights_vaep, weights_has_vaep = [], [], [], []
+    for point_index, point in enumerate(GRID_POINTS):
+        x = gamestates[f'{point}_x'].to_numpy(dtype=np.float64)
+        y = gamestates[f'{point}_y'].to_numpy(dtype=np.float64)
+
+        # Célula de cada ponto pelas mesmas bordas do histogram2d; a borda
+        # máxima entra na última célula
+        ix = np.minimum(np.searchsorted(x_edges, x, side='right') - 1, nx - 1)
+        iy = np.minimum(np.searchsorted(y_edges, y, side='right') - 1, ny - 1)
+        valid = (group >= 0) & (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)
+
+        flat.append(((group[valid] * len(GRID_POINTS) + point_index) * nx + ix[valid]) * ny + iy[valid])
+        weights_success.append(success[valid])
+        weights_vaep.append(np.where(has_vaep, vaep, 0.0)[valid])
+        weights_has_vaep.append(has_vaep[valid])
+
+    flat = np.concatenate(flat)
+    size = n_groups * len(GRID_POINTS) * nx * ny
+    shape = (n_groups, len(GRID_POINTS), nx, ny)
+
+    return {
+        'count': np.bincount(flat, minlength=size).reshape(shape),
+        'success': np.bincount(flat, np.concatenate(weights_success), minlength=size).astype(np.int64).reshape(shape),
+        'vaep_sum': np.bincount(flat, np.concatenate(weights_vaep), minlength=size).reshape(shape),
+        'vaep_count': np.bincount(flat, np.concatenate(weights_has_vaep), minlength=size).astype(np.int64).reshape(shape),
+    }
+
+
+def _prepare(gamestates, seasons, vaep_values):
+    """
+    Adiciona temporada e VAEP aos gamestates (colunas season e vaep_value)
+    """
+    gamestates = gamestates.copy()
+
+    if 'season' not in gamestates.columns:
+        if seasons is not None:
+            gamestates['season'] = gamestates['match_id'].astype(int).map(seasons)
+        else:
+            gamestates['season'] = ""
+    gamestates['season'] = gamestates['season'].fillna("").astype(str)
+    gamestates['cross_region'] = gamestates['cross_region'].fillna("").astype(str)
+    gamestates['team_id'] = gamestates['team_id'].astype(np.int64)
+
+    if vaep_values is not None:
+        vaep = vaep_values.dropna(subset=['original_event_id']).drop_duplicates('original_event_id')
+        vaep = vaep.set_index(vaep['original_event_id'].astype(np.int64))['vaep_value']
+        gamestates['vaep_value'] = gamestates['event_id'].astype(np.int64).map(vaep)
+
+    return gamestates
+
+
+def update_grids(gamestates: pd.DataFrame, path=GRIDS_PATH, seasons=None, vaep_values=None,
+                 bins=GRID_BINS, range=GRID_RANGE):
+    """
+    Inclui os cruzamentos de novas partidas nas grades. Partidas que já
+    estão no store são ignoradas, então o mesmo parquet pode ser passado de novo.
+
+    Args:
+        gamestates (pd.DataFrame): Gamestates de cruzamentos (ex: gamestates_final.parquet)
+        path (str): Diretório do store
+        seasons (dict): match_id -> temporada (ver player_stats.load_seasons)
+        vaep_values (pd.DataFrame): Saída de calculate_vaep_values, ligada
+            aos cruzamentos por original_event_id (sem ela não há mean_vaep)
+        bins (tuple): Número de células (só usado ao criar o store)
+        range (tuple): Limites da grade (só usado ao criar o store)
+
+    Returns:
+        list: match_ids incluídos nesta atualização
+    """
+    grids = load_grids(path)
+    if grids is None:
+        grids = {'keys': pd.DataFrame(columns=GRID_KEYS), 'bins': tuple(bins), 'range': tuple(map(tuple, range)),
+                 'game_ids': [], **_empty_grids(0, bins)}
+
+    known = set(grids['game_ids'])
+    new_games = [match_id for match_id in gamestates['match_id'].dropna().astype(int).unique().tolist()
+                 if match_id not in known]
+    if not new_games:
+        return []
+
+    new = _prepare(gamestates[gamestates['match_id'].isin(new_games)], seasons, vaep_values)
+
+    # Grupos novos entram no fim da tabela de grupos, com grades zeradas
+    new_keys = new[GRID_KEYS].drop_duplicates()
+    index = pd.MultiIndex.from_frame(grids['keys'].astype({'team_id': np.int64}))
+    new_keys = new_keys[index.get_indexer(pd.MultiIndex.from_frame(new_keys)) < 0]
+    if len(new_keys):
+        grids['keys'] = pd.concat([grids['keys'], new_keys], ignore_index=True).astype({'team_id': np.int64})
+        empty = _empty_grids(len(new_keys), grids['bins'])
+        for stat in empty:
+            grids[stat] = np.concatenate([grids[stat], empty[stat]])
+
+    counts = compute_grids(new, grids['keys'], grids['bins'], grids['range'])
+    for stat, values in counts.items():
+        grids[stat] += values
+
+    grids['game_ids'] = grids['game_ids'] + new_games
+    _save_grids(grids, path)
+
+    return new_games
+
+
+def grid(path=GRIDS_PATH, statistic='count', point='end', team_id=None, cross_region=None, season=None,
+         grids=None) -> dict:
+    """
+    Grade de um subconjunto direto do store, somando os grupos filtrados
+
+    Args:
+        path (str): Diretório do store
+        statistic (str): 'count', 'success_rate' ou 'mean_vaep'
+        point (str): 'start' ou 'end' do cruzamento
+        team_id (int): Filtra um time
+        cross_region (str): Filtra uma região do cruzamento
+        season (str): Filtra uma temporada
+        grids (dict): Store já carregado com load_grids (evita reler o arquivo)
+
+    Returns:
+        dict: 'statistic' (bins_y x bins_x, como o bin_statistic do mplsoccer),
+              'x_grid' e 'y_grid' (bordas das células) e 'cx' e 'cy'
+              (centros). As coordenadas são centradas como nos gamestates:
+              some 105/2 e 68/2 para o Pitch 'custom' do mplsoccer.
+    """
+    if statistic not in GRID_STATISTICS:
+        raise ValueError(f"Estatística inválida: {statistic} (use uma de {GRID_STATISTICS})")
+
+    grids = grids if grids is not None else load_grids(path)
+    if grids is None:
+        raise ValueError(f"Nenhuma grade em {path}")
+
+    keys = grids['keys']
+    mask = np.ones(len(keys), dtype=bool)
+    if team_id is not None:
+        mask &= (keys['team_id'] == team_id).to_numpy()
+    if cross_region is not None:
+        mask &= (keys['cross_region'] == cross_region).to_numpy()
+    if season is not None:
+        mask &= (keys['season'] == str(season)).to_numpy()
+
+    point_index = GRID_POINTS.index(point)
+
+    def total(stat):
+        return grids[stat][mask, point_index].sum(axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if statistic == 'count':
+            values = total('count').astype(float)
+        elif statistic == 'success_rate':
+            values = total('success') / total('count')
+        else:
+            values = total('vaep_sum') / total('vaep_count')
+
+    x_edges, y_edges = _edges(grids['bins'], grids['range'])
+    x_grid, y_grid = np.meshgrid(x_edges, y_edges)
+    cx, cy = np.meshgrid((x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2)
+
+    return {
+        'statistic': values.T,
+        'x_grid': x_grid,
+        'y_grid': y_grid,
+        'cx': cx,
+        'cy': cy,
+    }
@@ -0,0 +1,100 @@
+"""
+Benchmark do tempo de import dos pontos de entrada de utils.
+
+Cada import roda em um processo Python novo (sem cache de módulos), e além
+do tempo é verificado se alguma biblioteca pesada foi carregada sem
+necessidade. Com --check o script termina com erro nesses casos, para ser
+usado como verificação de regressão.
+
+Uso:
+    python -m utils.import_benchmark
+    python -m utils.import_benchmark --repeat 5 --check
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Bibliotecas pesadas que só devem ser carregadas por quem realmente usa
+# (o pyarrow não entra: o próprio pandas já o carrega)
+HEAVY_MODULES = ['sklearn', 'socceraction', 'xgboost', 'joblib', 'matplotlib', 'scipy', 'aiohttp']
+
+# Import -> bibliotecas pesadas que ele não pode carregar
+IMPORTS = {
+    "import utils": HEAVY_MODULES,
+    "from utils import convert_to_spadl": HEAVY_MODULES,
+    "from utils.io import read_events": HEAVY_MODULES,
+    "from utils.events import read_actions": HEAVY_MODULES,
+    "from utils.tracking import count_players_in_box": HEAVY_MODULES,
+    "from utils.pc import compute_pitch_control_batch": HEAVY_MODULES,
+    # O socceraction já carrega sklearn e xgboost
+    "from utils.vaep import calculate_vaep_values": ['matplotlib', 'aiohttp'],
+}
+
+_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+heavy = sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy!r}))
+print(json.dumps({{'seconds': elapsed, 'heavy': heavy}}))
+"""
+
+
+def measure_import(statement, repeat=3, cwd=None):
+    """
+    Mede o tempo de um import em processos novos
+
+    Args:
+        statement (str): Import a medir (ex: "from utils.io import read_events")
+        repeat (int): Número de processos; o menor tempo é retornado
+        cwd (str): Diretório de onde o import é feito (raiz do repositório)
+
+    Returns:
+        dict: 'seconds' (menor tempo) e 'heavy' (bibliotecas pesadas carregadas)
+    """
+    cwd = cwd or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = _SCRIPT.format(statement=statement, heavy=HEAVY_MODULES)
+
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", script], cwd=cwd, capture_output=True, text=True, check=True
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    return {
+        'seconds': min(run['seconds'] for run in runs),
+        'heavy': runs[0]['heavy'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do tempo de import de utils")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--check", action="store_true", help="Falha se algum import carregar bibliotecas proibidas")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Tempo máximo por import (com --check)")
+    args = parser.parse_args()
+
+    failures = []
+    for statement, forbidden in IMPORTS.items():
+        result = measure_import(statement, args.repeat)
+        loaded = sorted(set(result['heavy']) & set(forbidden))
+
+        print(f"{result['seconds'] * 1000:8.1f} ms  {statement}" + (f"  (carregou {', '.join(loaded)})" if loaded else ""))
+
+        if loaded:
+            failures.append(f"{statement}: carregou {', '.join(loaded)}")
+        if args.max_seconds is not None and result['seconds'] > args.max_seconds:
+            failures.append(f"{statement}: {result['seconds']:.3f}s > {args.max_seconds}s")
+
+    if args.check and failures:
+        print("\nRegressões:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
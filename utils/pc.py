@@ -1,12 +1,13 @@
 import numpy as np
 
-def prepare_pitch_control_input(frame_df, attacking_team_id, ball_x=0, ball_y=0):
+def prepare_pitch_control_input(frame_df, attacking_team_id, ball_position):
     """
     Prepara os dados de um frame para o cálculo de Pitch Control.
 
     frame_df: DataFrame com todos os jogadores de um frame.
     attacking_team_id: int - ID do time que está atacando.
-    ball_x, ball_y: posição da bola (ajuste se tiver tracking da bola real).
+    ball_position: tuple (x, y) - posição da bola no frame (ex: início do
+        cruzamento ou posição do jogador com a bola).
 
     Retorna:
         attacking_players: numpy array Nx4 [x, y, vx, vy]
@@ -18,7 +19,7 @@ def prepare_pitch_control_input(frame_df, attacking_team_id, ball_x=0, ball_y=0)
 
     attacking_players = attacking[['x', 'y', 'vx', 'vy']].to_numpy()
     defending_players = defending[['x', 'y', 'vx', 'vy']].to_numpy()
-    ball_position = (ball_x, ball_y)
+    ball_position = tuple(ball_position)
 
     return attacking_players, defending_players, ball_position
 
@@ -92,4 +93,96 @@ def generate_pitch_control_for_frame(attacking_players, defending_players, ball_
             )
             pitch_control_surface[iy, ix] = p_attack
 
-    return pitch_control_surface
\ No newline at end of file
+    return pitch_control_surface
+
+# Zonas da area (campo centrado em (0, 0), ataque para x positivo e cruzamento
+# vindo de y positivo, como em standardize_cross_directions_top_down)
+BOX_ZONE = ((36.5, 52.5), (-20.16, 20.16))
+NEAR_POST_ZONE = ((41.5, 52.5), (3, 20.16))
+FAR_POST_ZONE = ((41.5, 52.5), (-20.16, -3))
+
+
+def _zone_grid(zone, nx=12, ny=16):
+    """
+    Retorna um array (nx * ny, 2) com os pontos de uma grade regular sobre a zona.
+    """
+    (x_min, x_max), (y_min, y_max) = zone
+    X, Y = np.meshgrid(np.linspace(x_min, x_max, nx), np.linspace(y_min, y_max, ny))
+    return np.column_stack([X.ravel(), Y.ravel()])
+
+
+def compute_pitch_control_batch(attacking_players, defending_players, targets, params=None):
+    """
+    Versão vetorizada de compute_pitch_control_at_target para varios frames e
+    varios pontos de uma vez.
+
+    attacking_players: array (n_frames, n_att, 4) com [x, y, vx, vy]. Slots
+        vazios devem ser preenchidos com NaN.
+    defending_players: array (n_frames, n_def, 4), mesmo formato.
+    targets: array (n_frames, n_points, 2) ou (n_points, 2) se os pontos forem
+        os mesmos para todos os frames.
+
+    Retorna:
+        array (n_frames, n_points) com a probabilidade de controle do ataque.
+    """
+    if params is None:
+        params = {
+            'max_player_speed': 5.0  # metros por segundo
+        }
+
+    reaction_time = 0.7
+    lambda_att = 4.3
+
+    targets = np.asarray(targets, dtype=float)
+    if targets.ndim == 2:
+        targets = targets[np.newaxis]
+
+    def min_time_to_targets(players):
+        # (n_frames, n_players, 1, 2) - (n_frames, 1, n_points, 2)
+        diff = targets[:, np.newaxis, :, :] - players[:, :, np.newaxis, :2]
+        t = reaction_time + np.hypot(diff[..., 0], diff[..., 1]) / (params['max_player_speed'] + 1e-6)
+        # Slots de padding (NaN) nunca chegam na bola
+        t = np.where(np.isnan(t), np.inf, t)
+        return t.min(axis=1, initial=np.inf)
+
+    min_t_attack = min_time_to_targets(np.asarray(attacking_players, dtype=float))
+    min_t_defense = min_time_to_targets(np.asarray(defending_players, dtype=float))
+
+    with np.errstate(invalid='ignore', over='ignore'):
+        return sigmoid(lambda_att * (min_t_defense - min_t_attack))
+
+
+def compute_cross_pitch_control_features(attacking_players, defending_players, targets, params=None):
+    """
+    Calcula as features de pitch control para um lote de cruzamentos.
+
+    attacking_players, defending_players: arrays (n_crosses, n_slots, 4) como em
+        compute_pitch_control_batch.
+    targets: array (n_crosses, 2) com o ponto final de cada cruzamento.
+
+    Retorna:
+        dict com arrays (n_crosses,):
+            pc_attack_at_target: controle do ataque no alvo do cruzamento
+            pc_box: controle médio do ataque sobre a área
+            pc_near_post: controle médio na zona do primeiro pau
+            pc_far_post: controle médio na zona do segundo pau
+    """
+    targets = np.asarray(targets, dtype=float).reshape(-1, 2)
+    zones = [_zone_grid(BOX_ZONE), _zone_grid(NEAR_POST_ZONE), _zone_grid(FAR_POST_ZONE)]
+
+    # Um unico cálculo para o alvo de cada cruzamento + todas as grades
+    zone_points = np.concatenate(zones)
+    all_targets = np.concatenate([
+        targets[:, np.newaxis, :],
+        np.broadcast_to(zone_points, (len(targets),) + zone_points.shape),
+    ], axis=1)
+
+    pc = compute_pitch_control_batch(attacking_players, defending_players, all_targets, params)
+
+    features = {'pc_attack_at_target': pc[:, 0]}
+    start = 1
+    for name, grid in zip(['pc_box', 'pc_near_post', 'pc_far_post'], zones):
+        features[name] = pc[:, start:start + len(grid)].mean(axis=1)
+        start += len(grid)
+
+    return features
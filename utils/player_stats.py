@@ -0,0 +1,192 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+PLAYER_STATS_PATH = "./data/player_stats/"
+METADATA_PATH = "./data/metadata.csv"
+
+STAT_KEYS = ['player_id', 'team_id', 'season']
+STAT_VALUES = ['vaep_value', 'offensive_value', 'defensive_value', 'scoring_prob', 'conceding_prob']
+
+
+def load_seasons(metadata_path=METADATA_PATH) -> dict:
+    """
+    Temporada de cada partida (game_id -> season) a partir do metadata.csv
+    """
+    metadata = pd.read_csv(metadata_path, usecols=['id', 'season'])
+    return dict(zip(metadata['id'].astype(int), metadata['season'].astype(str)))
+
+
+def match_stats(values: pd.DataFrame, seasons=None) -> pd.DataFrame:
+    """
+    Estatísticas acumuláveis (count, sum, sum_sq, min, max) de cada valor
+    VAEP por jogador, time e temporada
+
+    Args:
+        values (pd.DataFrame): Saída de calculate_vaep_values (uma ou mais partidas)
+        seasons (dict): game_id -> temporada (usa a coluna 'season' se existir)
+
+    Returns:
+        pd.DataFrame: Uma linha por (player_id, team_id, season)
+    """
+    # Ações sem jogador ou time (ex: bola fora) não entram nas estatísticas
+    values = values[values['vaep_value'].notna() & values['player_id'].notna() & values['team_id'].notna()]
+
+    if 'season' in values.columns:
+        season = values['season'].astype(str)
+    elif seasons is not None:
+        season = values['game_id'].astype(int).map(seasons).fillna("").astype(str)
+    else:
+        season = pd.Series("", index=values.index)
+
+    data = values[['player_id', 'team_id'] + STAT_VALUES].astype({'player_id': 'int64', 'team_id': 'int64'})
+    data = data.assign(season=season.to_numpy())
+
+    squares = data[STAT_VALUES].pow(2).add_suffix('_sum_sq')
+    grouped = pd.concat([data, squares], axis=1).groupby(STAT_KEYS)
+
+    stats = pd.concat([
+        grouped[STAT_VALUES].count().add_suffix('_count'),
+        grouped[STAT_VALUES].sum().add_suffix('_sum'),
+        grouped[list(squares.columns)].sum(),
+        grouped[STAT_VALUES].min().add_suffix('_min'),
+        grouped[STAT_VALUES].max().add_suffix('_max'),
+    ], axis=1)
+
+    return stats
+
+
+def merge_stats(stats: pd.DataFrame, keys=STAT_KEYS) -> pd.DataFrame:
+    """
+    Junta linhas de estatísticas com as mesmas chaves: somas e contagens são
+    somadas, mínimos e máximos combinados. Também serve para agregar em um
+    nível mais alto (ex: só por player_id).
+    """
+    grouped = stats.groupby(list(keys))
+
+    agg = {}
+    for col in stats.columns:
+        if col.endswith('_min'):
+            agg[col] = 'min'
+        elif col.endswith('_max'):
+            agg[col] = 'max'
+        else:
+            agg[col] = 'sum'
+
+    return grouped.agg(agg)
+
+
+def _store_files(path):
+    return os.path.join(path, "stats.parquet"), os.path.join(path, "games.parquet")
+
+
+def load_player_stats(path=PLAYER_STATS_PATH):
+    """
+    Lê o store de estatísticas
+
+    Returns:
+        tuple: (estatísticas por chave, lista de game_ids já incluídos)
+    """
+    stats_file, games_file = _store_files(path)
+    if not os.path.exists(stats_file):
+        return None, []
+
+    return pd.read_parquet(stats_file), pd.read_parquet(games_file)['game_id'].tolist()
+
+
+def update_player_stats(values: pd.DataFrame, path=PLAYER_STATS_PATH, seasons=None):
+    """
+    Inclui os valores VAEP de novas partidas no store. Partidas que já estão
+    no store são ignoradas, então a mesma saída pode ser passada de novo.
+
+    Args:
+        values (pd.DataFrame): Saída de calculate_vaep_values
+        path (str): Diretório do store
+        seasons (dict): game_id -> temporada (ver load_seasons)
+
+    Returns:
+        list: game_ids incluídos nesta atualização
+    """
+    stats, games = load_player_stats(path)
+
+    new_games = [game_id for game_id in values['game_id'].unique().tolist() if game_id not in set(games)]
+    if not new_games:
+        return []
+
+    new_stats = match_stats(values[values['game_id'].isin(new_games)], seasons)
+    stats = new_stats if stats is None else merge_stats(pd.concat([stats, new_stats]))
+
+    stats_file, games_file = _store_files(path)
+    os.makedirs(path, exist_ok=True)
+    stats.to_parquet(stats_file)
+    pd.DataFrame({'game_id': games + new_games}).to_parquet(games_file)
+
+    return new_games
+
+
+def player_table(stats: pd.DataFrame, keys=('player_id',)) -> pd.DataFrame:
+    """
+    Tabela por jogador (ou por jogador/time/temporada) com as mesmas colunas
+    do analyze_top_vaep_players do resultados-parciais.ipynb
+
+    Args:
+        stats (pd.DataFrame): Estatísticas do store
+        keys (tuple): Chaves de agregação, subconjunto de STAT_KEYS
+    """
+    stats = merge_stats(stats.reset_index(), keys)
+
+    def mean(col):
+        return stats[f"{col}_sum"] / stats[f"{col}_count"]
+
+    n = stats['vaep_value_count']
+    variance = (stats['vaep_value_sum_sq'] - stats['vaep_value_sum'] ** 2 / n) / (n - 1)
+
+    table = pd.DataFrame({
+        'total_actions': n,
+        'vaep_total': stats['vaep_value_sum'],
+        'vaep_mean': mean('vaep_value'),
+        'vaep_std': np.sqrt(variance.clip(lower=0)).where(n > 1),
+        'vaep_min': stats['vaep_value_min'],
+        'vaep_max': stats['vaep_value_max'],
+        'offensive_total': stats['offensive_value_sum'],
+        'offensive_mean': mean('offensive_value'),
+        'defensive_total': stats['defensive_value_sum'],
+        'defensive_mean': mean('defensive_value'),
+        'avg_scoring_prob': mean('scoring_prob'),
+        'avg_conceding_prob': mean('conceding_prob'),
+    })
+
+    return table.reset_index()
+
+
+def leaderboard(path=PLAYER_STATS_PATH, by='vaep_total', keys=('player_id',), min_actions=50, top_n=20,
+                team_id=None, season=None) -> pd.DataFrame:
+    """
+    Ranking de jogadores direto do store, sem reprocessar as ações
+
+    Args:
+        path (str): Diretório do store
+        by (str): Coluna da player_table usada no ranking (ex: 'vaep_total', 'vaep_mean')
+        keys (tuple): Chaves de agregação, subconjunto de STAT_KEYS
+        min_actions (int): Mínimo de ações do jogador
+        top_n (int): Número de jogadores
+        team_id (int): Filtra um time
+        season (str): Filtra uma temporada
+
+    Returns:
+        pd.DataFrame: top_n linhas da player_table ordenadas por `by`
+    """
+    stats, _ = load_player_stats(path)
+    if stats is None:
+        raise ValueError(f"Nenhuma estatística em {path}")
+
+    if team_id is not None:
+        stats = stats[stats.index.get_level_values('team_id') == team_id]
+    if season is not None:
+        stats = stats[stats.index.get_level_values('season') == str(season)]
+
+    table = player_table(stats, keys)
+    table = table[table['total_actions'] >= min_actions]
+
+    return table.nlargest(top_n, by)
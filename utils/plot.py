@@ -1,7 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
-def plot_pitch( field_dimen = (106.0,68.0), field_color ='green', linewidth=2, markersize=20):
+def plot_pitch( field_dimen = (106.0,68.0), field_color ='green', linewidth=2, markersize=20, ax=None):
     """ plot_pitch
     
     Plots a soccer pitch. All distance units converted to meters.
@@ -12,13 +12,17 @@ def plot_pitch( field_dimen = (106.0,68.0), field_color ='green', linewidth=2, m
         field_color: color of field. options are {'green','white'}
         linewidth  : width of lines. default = 2
         markersize : size of markers (e.g. penalty spot, centre spot, posts). default = 20
+        ax         : existing axes to draw on. default = None (creates a new figure)
         
     Returrns
     -----------
        fig,ax : figure and aixs objects (so that other data can be plotted onto the pitch)
 
     """
-    fig,ax = plt.subplots(figsize=(12,8)) # create a figure 
+    if ax is None:
+        fig,ax = plt.subplots(figsize=(12,8)) # create a figure 
+    else:
+        fig = ax.figure
     # decide what color we want the field to be. Default is green, but can also choose white
     if field_color=='green':
         ax.set_facecolor('mediumseagreen')
@@ -89,4 +93,188 @@ def plot_pitch( field_dimen = (106.0,68.0), field_color ='green', linewidth=2, m
     ax.set_xlim([-xmax,xmax])
     ax.set_ylim([-ymax,ymax])
     ax.set_axisbelow(True)
-    return fig,ax
\ No newline at end of file
+    return fig,ax
+
+class PitchRenderer:
+    """
+    Renderizador rápido de frames de tracking sobre o campo.
+
+    O campo é desenhado uma única vez e guardado como imagem de fundo; a cada
+    frame só as camadas que mudam (pitch control, jogadores, setas de
+    velocidade e bola) são redesenhadas por cima do fundo (blitting). Usa uma
+    figura Agg própria, sem passar pelo pyplot.
+
+    Exemplo:
+        renderer = PitchRenderer()
+        for event_id in event_ids:
+            frame = tracking_df[tracking_df["possession_event_id"] == event_id]
+            renderer.render(frame, highlight=(team_id, jersey_number))
+            renderer.save(f"{event_id}.png")
+    """
+
+    def __init__(self, field_dimen=(106.0, 68.0), field_color='green', figsize=(12, 8), dpi=100,
+                 pc_extent=(-60, 60, -40, 40), max_players=11):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot()
+        plot_pitch(field_dimen, field_color, ax=self.ax)
+        self.fig.tight_layout()
+
+        ax = self.ax
+
+        # Pitch control é pintado direto no buffer (cmap 'bwr', alpha 0.4 como
+        # nos notebooks): o imshow reamostra a imagem inteira a cada frame
+        import matplotlib
+        self.pc_extent = pc_extent
+        self.pc_alpha = 0.4
+        lut = matplotlib.colormaps['bwr'](np.linspace(0, 1, 256))[:, :3] * 255
+        self._pc_lut = np.round(lut * self.pc_alpha).astype(np.uint8)
+        self._pc_pixels = {}
+
+        # Quantidade fixa de setas por time: as sobrando ficam fora do campo
+        self.max_players = max_players
+        hidden = np.full((max_players, 2), np.nan)
+        zeros = np.zeros(max_players)
+
+        self.players = {}
+        self.arrows = {}
+        for element, color in [("home", "blue"), ("away", "red")]:
+            self.players[element] = ax.scatter([], [], color=color, animated=True)
+            self.arrows[element] = ax.quiver(
+                hidden[:, 0], hidden[:, 1], zeros, zeros,
+                color=color, scale=50, width=0.002, headwidth=3, headlength=5, headaxislength=4,
+                animated=True
+            )
+
+        self.highlight = ax.scatter([], [], facecolors="none", edgecolors="black", linewidths=2, animated=True)
+        self.ball = ax.scatter([], [], color="white", edgecolors="black", s=40, zorder=5, animated=True)
+
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+
+    def _pc_pixel_map(self, shape):
+        """
+        Para cada pixel dentro dos eixos, a célula da superfície de pitch
+        control que cai nele, e o fundo dessa região já multiplicado por
+        (1 - alpha) (calculado uma vez por formato de superfície)
+        """
+        if shape in self._pc_pixels:
+            return self._pc_pixels[shape]
+
+        height = self.canvas.get_width_height()[1]
+        x0, y0, x1, y1 = self.ax.bbox.extents
+        cols = np.arange(int(np.ceil(x0)), int(np.floor(x1)))
+        rows = np.arange(int(np.ceil(y0)), int(np.floor(y1)))
+
+        inverse = self.ax.transData.inverted()
+        data_x = inverse.transform(np.column_stack([cols + 0.5, np.full(len(cols), y0)]))[:, 0]
+        data_y = inverse.transform(np.column_stack([np.full(len(rows), x0), rows + 0.5]))[:, 1]
+
+        xmin, xmax, ymin, ymax = self.pc_extent
+        n_rows, n_cols = shape
+        j = np.floor((data_x - xmin) / (xmax - xmin) * n_cols).astype(int)
+        i = np.floor((data_y - ymin) / (ymax - ymin) * n_rows).astype(int)
+
+        valid_cols = (j >= 0) & (j < n_cols)
+        valid_rows = (i >= 0) & (i < n_rows)
+
+        # Linhas do buffer começam no topo da imagem: a região é um retângulo
+        # contínuo, com as linhas da superfície em ordem invertida
+        buffer_rows = height - 1 - rows[valid_rows]
+        buffer_cols = cols[valid_cols]
+        region = (
+            slice(buffer_rows.min(), buffer_rows.max() + 1),
+            slice(buffer_cols.min(), buffer_cols.max() + 1),
+        )
+        self.canvas.restore_region(self.background)
+        background = np.asarray(self.canvas.buffer_rgba())[region][..., :3]
+        background = np.round(background * (1 - self.pc_alpha)).astype(np.uint8)
+
+        pixel_map = (region, i[valid_rows][::-1], j[valid_cols], background)
+        self._pc_pixels[shape] = pixel_map
+
+        return pixel_map
+
+    def _draw_pc_surface(self, pc_surface):
+        region, surface_rows, surface_cols, background = self._pc_pixel_map(pc_surface.shape)
+
+        # Cor de cada célula, expandida para os pixels linha a linha e coluna a
+        # coluna; a LUT e o fundo já estão multiplicados pelos pesos da
+        # mistura, então basta somar em uint8
+        levels = (np.clip(np.nan_to_num(pc_surface, nan=0.5), 0, 1) * 255).astype(np.uint8)
+        colors = self._pc_lut[levels].take(surface_rows, axis=0).take(surface_cols, axis=1)
+
+        np.add(background, colors, out=np.asarray(self.canvas.buffer_rgba())[region][..., :3])
+
+    def _set_arrows(self, element, team_df):
+        n = min(len(team_df), self.max_players)
+
+        offsets = np.full((self.max_players, 2), np.nan)
+        u = np.zeros(self.max_players)
+        v = np.zeros(self.max_players)
+
+        offsets[:n, 0] = team_df["x"].to_numpy()[:n]
+        offsets[:n, 1] = team_df["y"].to_numpy()[:n]
+        if "vx" in team_df.columns:
+            u[:n] = np.nan_to_num(team_df["vx"].to_numpy(dtype=float)[:n])
+            v[:n] = np.nan_to_num(team_df["vy"].to_numpy(dtype=float)[:n])
+
+        self.arrows[element].set_offsets(offsets)
+        self.arrows[element].set_UVC(u, v)
+
+    def render(self, frame, highlight=None, pc_surface=None, ball_position=None):
+        """
+        Desenha um frame sobre o campo em cache
+
+        Args:
+            frame (pd.DataFrame): Tracking de um frame (colunas element, x, y
+                e, opcionalmente, vx, vy, team_id, jersey_number)
+            highlight (tuple): (team_id, jersey_number) do jogador destacado
+            pc_surface (np.ndarray): Superfície de pitch control (opcional)
+            ball_position (tuple): Posição (x, y) da bola (opcional)
+
+        Returns:
+            PitchRenderer: o próprio renderizador (para encadear com save)
+        """
+        self.canvas.restore_region(self.background)
+
+        if pc_surface is not None:
+            self._draw_pc_surface(np.asarray(pc_surface))
+
+        for element in ("home", "away"):
+            team_df = frame[frame["element"] == element]
+            self.players[element].set_offsets(team_df[["x", "y"]].to_numpy())
+            self._set_arrows(element, team_df)
+            self.ax.draw_artist(self.players[element])
+            self.ax.draw_artist(self.arrows[element])
+
+        if highlight is not None:
+            team_id, jersey_number = highlight
+            player = frame[(frame["team_id"] == team_id) & (frame["jersey_number"] == jersey_number)]
+            self.highlight.set_offsets(player[["x", "y"]].to_numpy())
+            self.ax.draw_artist(self.highlight)
+
+        if ball_position is not None and not np.isnan(ball_position).any():
+            self.ball.set_offsets(np.atleast_2d(ball_position))
+            self.ax.draw_artist(self.ball)
+
+        self.canvas.blit(self.fig.bbox)
+
+        return self
+
+    def to_array(self):
+        """
+        Imagem RGBA do último frame renderizado
+        """
+        return np.asarray(self.canvas.buffer_rgba()).copy()
+
+    def save(self, path):
+        """
+        Salva o último frame renderizado (sem redesenhar a figura)
+        """
+        import matplotlib.image
+
+        matplotlib.image.imsave(path, np.asarray(self.canvas.buffer_rgba()))
@@ -0,0 +1,198 @@
+import datetime
+import hashlib
+import json
+import os
+
+import joblib
+import pandas as pd
+
+REGISTRY_PATH = "./models/"
+
+_MODEL_FILES = {
+    'scoring': "vaep_scoring_model.joblib",
+    'conceding': "vaep_conceding_model.joblib",
+}
+
+
+class LazyModel:
+    """
+    Proxy de um modelo salvo no registry. O arquivo só é lido (com os arrays
+    mapeados em memória) no primeiro acesso a um atributo, como predict_proba.
+    """
+
+    def __init__(self, path, mmap_mode="r"):
+        self.path = path
+        self.mmap_mode = mmap_mode
+        self._model = None
+
+    def load(self):
+        if self._model is None:
+            self._model = joblib.load(self.path, mmap_mode=self.mmap_mode)
+        return self._model
+
+    def __getattr__(self, name):
+        # Atributos privados não são repassados (evita recursão em copy/pickle)
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    def __repr__(self):
+        status = "carregado" if self._model is not None else "não carregado"
+        return f"LazyModel({self.path!r}, {status})"
+
+
+def data_hash(df: pd.DataFrame) -> str:
+    """
+    Hash do conteúdo de um DataFrame (ex: X de treino), gravado nos metadados
+    para saber com quais dados cada versão foi treinada.
+    """
+    h = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    h.update(",".join(map(str, df.columns)).encode())
+    return h.hexdigest()
+
+
+def _read_tags(registry_path):
+    tags_path = os.path.join(registry_path, "tags.json")
+    if not os.path.exists(tags_path):
+        return {}
+    with open(tags_path) as f:
+        return json.load(f)
+
+
+def list_versions(registry_path=REGISTRY_PATH):
+    """
+    Lista as versões salvas no registry, da mais antiga para a mais nova
+    """
+    if not os.path.isdir(registry_path):
+        return []
+    return sorted(
+        name for name in os.listdir(registry_path)
+        if os.path.exists(os.path.join(registry_path, name, "metadata.json"))
+    )
+
+
+def resolve_version(version="latest", registry_path=REGISTRY_PATH):
+    """
+    Resolve "latest", uma tag ou uma versão explícita para o nome da versão
+
+    Args:
+        version (str): "latest", uma tag registrada ou a própria versão
+        registry_path (str): Diretório do registry
+
+    Returns:
+        str: Nome da versão (timestamp)
+    """
+    versions = list_versions(registry_path)
+    if not versions:
+        raise ValueError(f"Nenhum modelo registrado em {registry_path}")
+
+    if version == "latest":
+        return versions[-1]
+
+    tags = _read_tags(registry_path)
+    if version in tags:
+        return tags[version]
+
+    if version in versions:
+        return version
+
+    raise ValueError(f"Versão ou tag desconhecida: {version}")
+
+
+def tag_version(version, tag, registry_path=REGISTRY_PATH):
+    """
+    Associa uma tag (ex: "producao") a uma versão do registry
+    """
+    version = resolve_version(version, registry_path)
+    tags = _read_tags(registry_path)
+    tags[tag] = version
+
+    with open(os.path.join(registry_path, "tags.json"), "w") as f:
+        json.dump(tags, f, indent=2)
+
+    return version
+
+
+def register_models(models, X=None, metrics=None, tag=None, registry_path=REGISTRY_PATH):
+    """
+    Salva os modelos de scoring e conceding como uma nova versão do registry
+
+    Os modelos são salvos com joblib sem compressão, para que os arrays possam
+    ser mapeados em memória na leitura.
+
+    Args:
+        models: Tupla com (model_score, model_concede)
+        X (pd.DataFrame): Features de treino, usadas para o hash dos dados
+        metrics (dict): Métricas de avaliação (ex: AUC de cada modelo)
+        tag (str): Tag opcional para a versão
+        registry_path (str): Diretório do registry
+
+    Returns:
+        str: Nome da versão criada
+    """
+    # Timestamp com microssegundos (continua ordenável com as versões antigas);
+    # o diretório nunca é reaproveitado, para uma versão não sobrescrever outra
+    os.makedirs(registry_path, exist_ok=True)
+    while True:
+        version = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        version_path = os.path.join(registry_path, version)
+        try:
+            os.makedirs(version_path)
+            break
+        except FileExistsError:
+            continue
+
+    model_score, model_concede = models
+
+    joblib.dump(model_score, os.path.join(version_path, _MODEL_FILES['scoring']))
+    joblib.dump(model_concede, os.path.join(version_path, _MODEL_FILES['conceding']))
+
+    feature_names = getattr(model_score, "feature_names_in_", None)
+
+    metadata = {
+        'version': version,
+        'created_at': datetime.datetime.now().isoformat(),
+        'model_class': type(model_score).__name__,
+        'feature_names': list(map(str, feature_names)) if feature_names is not None else None,
+        'training_data_hash': data_hash(X) if X is not None else None,
+        'metrics': metrics or {},
+    }
+
+    with open(os.path.join(version_path, "metadata.json"), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    if tag is not None:
+        tag_version(version, tag, registry_path)
+
+    print(f"Modelos registrados na versão {version}: {version_path}")
+
+    return version
+
+
+def load_metadata(version="latest", registry_path=REGISTRY_PATH):
+    """
+    Lê os metadados (features, hash dos dados, métricas) de uma versão
+    """
+    version = resolve_version(version, registry_path)
+    with open(os.path.join(registry_path, version, "metadata.json")) as f:
+        return json.load(f)
+
+
+def load_models(version="latest", registry_path=REGISTRY_PATH, mmap_mode="r"):
+    """
+    Carrega os modelos de uma versão do registry de forma preguiçosa
+
+    Args:
+        version (str): "latest", uma tag ou a versão
+        registry_path (str): Diretório do registry
+        mmap_mode (str): Modo de mmap do joblib (None para ler tudo em memória)
+
+    Returns:
+        tuple: (model_score, model_concede) como LazyModel
+    """
+    version_path = os.path.join(registry_path, resolve_version(version, registry_path))
+
+    return (
+        LazyModel(os.path.join(version_path, _MODEL_FILES['scoring']), mmap_mode),
+        LazyModel(os.path.join(version_path, _MODEL_FILES['conceding']), mmap_mode),
+    )
@@ -0,0 +1,294 @@
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import ParameterGrid, StratifiedGroupKFold, StratifiedKFold
+from tqdm import tqdm
+
+GAMESTATES_PATH = "./gamestates_final.parquet"
+
+# Mesmo espaço de busca do GridSearchCV do analysis.ipynb
+XGB_PARAM_GRID = {
+    'n_estimators': [100, 200],
+    'max_depth': [3, 5, 7],
+    'learning_rate': [0.01, 0.1, 0.2],
+    'subsample': [0.8, 1.0],
+    'colsample_bytree': [0.8, 1.0],
+}
+
+# A validação usa só a métrica da busca (ver _custom_metric)
+XGB_BASE_PARAMS = {
+    'objective': 'binary:logistic',
+    'disable_default_eval_metric': 1,
+    'tree_method': 'hist',
+    'seed': 42,
+}
+
+
+def load_cross_dataset(path=GAMESTATES_PATH):
+    """
+    Lê os gamestates de cruzamentos e monta X (com one-hot de action_1 e
+    cross_region), y (cross_success) e os grupos (match_id) para a validação
+    cruzada
+
+    Returns:
+        tuple: (X, y, groups)
+    """
+    gamestates = pd.read_parquet(path)
+
+    groups = gamestates["match_id"].to_numpy()
+    y = gamestates["cross_success"].astype(int)
+
+    X = gamestates.drop(columns=["match_id", "event_id", "team_id", "cross_success"])
+    X = pd.get_dummies(X, columns=['action_1', 'cross_region'])
+
+    return X, y, groups
+
+
+def fold_splits(y, groups=None, n_splits=5, random_state=42):
+    """
+    Índices (treino, validação) de cada fold, estratificados por y e, se
+    groups for passado, sem dividir um grupo (ex: partida) entre os dois
+
+    Returns:
+        list: Lista de tuplas (train_idx, valid_idx)
+    """
+    y = np.asarray(y)
+
+    if groups is None:
+        cv = StratifiedKFold(n_splits, shuffle=True, random_state=random_state)
+    else:
+        cv = StratifiedGroupKFold(n_splits, shuffle=True, random_state=random_state)
+
+    return list(cv.split(np.zeros(len(y)), y, groups))
+
+
+def build_folds(X, y, groups=None, n_splits=5, random_state=42, max_bin=256, splits=None):
+    """
+    Monta as matrizes do XGBoost de cada fold uma única vez, para serem
+    reaproveitadas por todas as configurações da busca. As features são
+    quantizadas em bins no treino e a validação usa os mesmos bins.
+
+    Args:
+        X (pd.DataFrame): Features
+        y (pd.Series): Labels
+        groups (np.ndarray): Grupos (ex: match_id) para não dividir uma partida
+            entre treino e validação. Se None, usa StratifiedKFold.
+        n_splits (int): Número de folds
+        random_state (int): Seed da divisão
+        max_bin (int): Número de bins por feature
+        splits (list): Saída de fold_splits (calculada se None)
+
+    Returns:
+        list: Um dict por fold com 'dtrain', 'dvalid' e 'y_valid'
+    """
+    y = np.asarray(y)
+
+    if splits is None:
+        splits = fold_splits(y, groups, n_splits, random_state)
+
+    folds = []
+    for train_idx, valid_idx in splits:
+        dtrain = xgb.QuantileDMatrix(X.iloc[train_idx], label=y[train_idx], max_bin=max_bin)
+        dvalid = xgb.QuantileDMatrix(X.iloc[valid_idx], label=y[valid_idx], ref=dtrain)
+        folds.append({'dtrain': dtrain, 'dvalid': dvalid, 'y_valid': y[valid_idx]})
+
+    return folds
+
+
+def _score(y_true, proba, scoring):
+    if scoring == "f1":
+        # Mesmo valor do f1_score do sklearn, sem o overhead (roda a cada rodada)
+        y_true = np.asarray(y_true).astype(bool)
+        predicted = proba >= 0.5
+        total = predicted.sum() + y_true.sum()
+        return 2 * (predicted & y_true).sum() / total if total else 0.0
+    if scoring == "roc_auc":
+        return roc_auc_score(y_true, proba)
+    raise ValueError(f"Métrica desconhecida: {scoring}")
+
+
+def _custom_metric(scoring):
+    """
+    Métrica da busca como custom_metric do xgb.train, para o early stopping
+    acompanhar o próprio scoring (o logloss para cedo demais para o F1)
+    """
+    def metric(proba, dmatrix):
+        return scoring, float(_score(dmatrix.get_label(), proba, scoring))
+
+    return metric
+
+
+def _train_fold(params, fold, state, rounds, early_stopping_rounds, scoring):
+    """
+    Treina (ou continua treinando) o booster de uma configuração em um fold
+    até `rounds` rodadas e guarda a melhor iteração na validação.
+    """
+    booster = state.get('booster')
+    done = booster.num_boosted_rounds() if booster is not None else 0
+
+    if state.get('stopped') or rounds <= done:
+        return state
+
+    booster = xgb.train(
+        params,
+        fold['dtrain'],
+        num_boost_round=rounds - done,
+        evals=[(fold['dvalid'], 'valid')],
+        custom_metric=_custom_metric(scoring),
+        maximize=True,
+        early_stopping_rounds=early_stopping_rounds,
+        xgb_model=booster,
+        verbose_eval=False,
+    )
+
+    # O early stopping só enxerga as rodadas desta etapa: compara com a
+    # melhor iteração das etapas anteriores
+    best_iteration = booster.best_iteration
+    proba = booster.predict(fold['dvalid'], iteration_range=(0, best_iteration + 1))
+    score = _score(fold['y_valid'], proba, scoring)
+
+    if 'score' in state and state['score'] >= score:
+        best_iteration, score = state['best_iteration'], state['score']
+
+    return {
+        'booster': booster,
+        'best_iteration': best_iteration,
+        'score': score,
+        'stopped': booster.num_boosted_rounds() < rounds,
+    }
+
+
+def successive_halving(X, y, param_grid=XGB_PARAM_GRID, groups=None, folds=None, n_splits=5, scoring="f1",
+                       min_rounds=25, factor=3, early_stopping_rounds=20, n_jobs=-1, random_state=42):
+    """
+    Busca de hiperparâmetros do XGBoost com successive halving
+
+    Todas as configurações começam com poucas rodadas de boosting; a cada
+    etapa só a melhor fração (1 / factor) continua, com factor vezes mais
+    rodadas, até o máximo de n_estimators de cada configuração. Os boosters
+    continuam o treino da etapa anterior em vez de recomeçar, os folds são
+    montados uma única vez e cada configuração para cedo quando o scoring
+    na validação não melhora. Configurações que só diferem em n_estimators
+    treinam uma vez, com o maior valor (a melhor iteração dá o número de
+    rodadas).
+
+    Args:
+        X (pd.DataFrame): Features
+        y (pd.Series): Labels
+        param_grid (dict): Espaço de busca (nomes do XGBClassifier). n_estimators
+            é o número máximo de rodadas de boosting.
+        groups (np.ndarray): Grupos para a validação cruzada (ex: match_id)
+        folds (list): Saída de build_folds, para reaproveitar entre buscas
+        n_splits (int): Número de folds
+        scoring (str): "f1" ou "roc_auc"
+        min_rounds (int): Rodadas de boosting na primeira etapa
+        factor (int): Fator de redução das configurações a cada etapa
+        early_stopping_rounds (int): Rodadas sem melhora do scoring antes de
+            parar (None desliga)
+        n_jobs (int): Número de treinos (configuração x fold) em paralelo
+        random_state (int): Seed da divisão dos folds
+
+    Returns:
+        dict: 'best_params', 'best_score', 'best_n_estimators' e 'results'
+              (DataFrame com o score de cada configuração em cada etapa)
+    """
+    if folds is None:
+        print("Montando folds...")
+        folds = build_folds(X, y, groups, n_splits, random_state)
+
+    # Uma configuração por conjunto de parâmetros do booster, com o maior n_estimators
+    unique = {}
+    for config in ParameterGrid(param_grid):
+        key = tuple(sorted((k, v) for k, v in config.items() if k != 'n_estimators'))
+        if key not in unique or config.get('n_estimators', 0) > unique[key].get('n_estimators', 0):
+            unique[key] = config
+    configs = list(unique.values())
+    print(f"{len(configs)} configurações x {len(folds)} folds")
+
+    n_cores = joblib.cpu_count() + 1 + n_jobs if n_jobs < 0 else n_jobs
+    n_parallel = max(1, min(n_cores, len(configs) * len(folds)))
+    nthread = max(1, n_cores // n_parallel)
+
+    def booster_params(config):
+        params = {k: v for k, v in config.items() if k != 'n_estimators'}
+        return {**XGB_BASE_PARAMS, **params, 'nthread': nthread}
+
+    states = {i: [{} for _ in folds] for i in range(len(configs))}
+    alive = list(range(len(configs)))
+    max_rounds = max(config.get('n_estimators', min_rounds) for config in configs)
+    rounds = min_rounds
+    results = []
+    rung = 0
+
+    with joblib.Parallel(n_jobs=n_parallel, prefer="threads") as parallel:
+        while True:
+            tasks = [
+                (i, f, min(rounds, configs[i].get('n_estimators', rounds)))
+                for i in alive for f in range(len(folds))
+            ]
+            trained = parallel(
+                joblib.delayed(_train_fold)(
+                    booster_params(configs[i]), folds[f], states[i][f], r, early_stopping_rounds, scoring
+                )
+                for i, f, r in tqdm(tasks, desc=f"Etapa {rung} ({rounds} rodadas)")
+            )
+            for (i, f, _), state in zip(tasks, trained):
+                states[i][f] = state
+
+            scores = {}
+            for i in alive:
+                scores[i] = np.mean([state['score'] for state in states[i]])
+                results.append({
+                    'config': i,
+                    'rung': rung,
+                    'rounds': rounds,
+                    **configs[i],
+                    'score': scores[i],
+                    'best_iteration': int(np.mean([state['best_iteration'] for state in states[i]])) + 1,
+                })
+
+            print(f"Etapa {rung}: {len(alive)} configurações, melhor {scoring} = {max(scores.values()):.4f}")
+
+            if len(alive) <= 1 or rounds >= max_rounds:
+                break
+
+            n_keep = max(1, len(alive) // factor)
+            alive = sorted(alive, key=lambda i: scores[i], reverse=True)[:n_keep]
+            rounds = min(rounds * factor, max_rounds)
+            rung += 1
+
+    # Libera os boosters guardados
+    states.clear()
+
+    results = pd.DataFrame(results)
+    last = results[results['rung'] == rung].sort_values('score', ascending=False).iloc[0]
+
+    best_params = configs[int(last['config'])]
+
+    print(f"Melhores parâmetros: {best_params}")
+    print(f"Melhor {scoring}: {last['score']:.4f}")
+
+    return {
+        'best_params': best_params,
+        'best_score': float(last['score']),
+        'best_n_estimators': int(last['best_iteration']),
+        'results': results,
+    }
+
+
+def fit_best(X, y, search_result, random_state=42):
+    """
+    Treina um XGBClassifier com os melhores parâmetros da busca, usando o
+    número de rodadas encontrado pelo early stopping
+
+    Returns:
+        XGBClassifier: Modelo treinado
+    """
+    params = {**search_result['best_params'], 'n_estimators': search_result['best_n_estimators']}
+
+    model = xgb.XGBClassifier(**params, eval_metric="logloss", random_state=random_state)
+    model.fit(X, y)
+
+    return model
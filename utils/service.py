@@ -0,0 +1,328 @@
+"""
+Serviço local de valoração VAEP em tempo (quase) real.
+
+Carrega os modelos de scoring e conceding uma única vez, mantém as últimas
+ações de cada jogo e agrupa requisições concorrentes em micro-lotes, com uma
+única predição por modelo por lote.
+
+Uso:
+    python -m utils.service --version latest --port 8080
+    python -m utils.service --unix-socket /tmp/vaep.sock
+
+Endpoints:
+    POST   /games/{game_id}/actions  lista de ações SPADL (JSON) -> valores VAEP
+    DELETE /games/{game_id}          descarta o estado do jogo
+    GET    /metrics                  latência p50/p99 e tamanho médio dos lotes
+"""
+import argparse
+import asyncio
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from aiohttp import web
+from sklearn.ensemble import RandomForestClassifier
+
+import socceraction.spadl.config as spadlcfg
+
+from . import compact_forest
+from .feature_store import compute_game_features
+from .registry import LazyModel, load_models
+from .vaep import vaep_formula
+
+# Número de ações no game state (mesmo valor usado no treino)
+NB_PREV_ACTIONS = 3
+
+
+class VAEPScoringService:
+    """
+    Estado do serviço: modelos, histórico recente de cada jogo e fila de
+    micro-lotes.
+    """
+
+    def __init__(self, models, max_batch_size=64, max_wait_ms=2.0, compact=True, latency_window=10000):
+        # Lê os modelos do registry uma única vez, na inicialização
+        model_score, model_concede = [m.load() if isinstance(m, LazyModel) else m for m in models]
+
+        # Florestas (inclusive as saídas de uma floresta multi-output) são
+        # avaliadas pela versão achatada
+        forest = getattr(model_score, "model", model_score)
+        if compact and isinstance(forest, RandomForestClassifier):
+            score_forest = compact_forest.flatten_forest(model_score)
+            concede_forest = compact_forest.flatten_forest(model_concede)
+            self._predict_score = lambda X: compact_forest.predict_positive_proba(score_forest, X)
+            self._predict_concede = lambda X: compact_forest.predict_positive_proba(concede_forest, X)
+        else:
+            self._predict_score = lambda X: model_score.predict_proba(X)[:, 1]
+            self._predict_concede = lambda X: model_concede.predict_proba(X)[:, 1]
+
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.games = {}
+        self.queue = None
+        self.latencies = deque(maxlen=latency_window)
+        self.batch_sizes = deque(maxlen=latency_window)
+
+    @staticmethod
+    def _new_state():
+        return {
+            # Últimas ações do jogo com suas probabilidades
+            'history': pd.DataFrame(),
+            'goals': {},
+            'owngoals': {},
+        }
+
+    def _game_state(self, game_id):
+        """
+        Estado atual de um jogo, sem criar a entrada (o estado só é gravado
+        em _run_batch, depois do lote inteiro dar certo)
+        """
+        return self.games.get(game_id) or self._new_state()
+
+    def reset_game(self, game_id):
+        self.games.pop(game_id, None)
+
+    def _goalscore(self, goals, owngoals, team_id):
+        team = goals.get(team_id, 0) + sum(n for t, n in owngoals.items() if t != team_id)
+        opponent = sum(n for t, n in goals.items() if t != team_id) + owngoals.get(team_id, 0)
+        return team, opponent
+
+    def _update_goalscore(self, state, actions, X):
+        """
+        Sobrescreve as features de goalscore com o placar acumulado do jogo,
+        pois elas dependem do jogo inteiro e não só do game state.
+
+        Returns:
+            tuple: Placar (goals, owngoals) depois das ações, sem alterar o estado
+        """
+        goals, owngoals = dict(state['goals']), dict(state['owngoals'])
+
+        is_shot = actions['type_name'].str.contains('shot').to_numpy()
+        is_goal = is_shot & (actions['result_id'].to_numpy() == spadlcfg.results.index('success'))
+        is_owngoal = is_shot & (actions['result_id'].to_numpy() == spadlcfg.results.index('owngoal'))
+
+        goalscore = []
+        for team_id, goal, owngoal in zip(actions['team_id'], is_goal, is_owngoal):
+            goalscore.append(self._goalscore(goals, owngoals, team_id))
+            if goal:
+                goals[team_id] = goals.get(team_id, 0) + 1
+            if owngoal:
+                owngoals[team_id] = owngoals.get(team_id, 0) + 1
+
+        goalscore = np.array(goalscore, dtype=X['goalscore_team'].dtype).reshape(-1, 2)
+        X['goalscore_team'] = goalscore[:, 0]
+        X['goalscore_opponent'] = goalscore[:, 1]
+        X['goalscore_diff'] = goalscore[:, 0] - goalscore[:, 1]
+
+        return goals, owngoals
+
+    def _features(self, batch):
+        """
+        Calcula as features das novas ações de todas as requisições do lote
+        com uma única chamada, usando as últimas ações de cada jogo como
+        contexto do game state.
+
+        Returns:
+            tuple: (uma matriz de features por requisição, placar (goals,
+                    owngoals) de cada jogo depois das ações)
+        """
+        windows, is_new = [], []
+        for game_id, actions, _, _ in batch:
+            history = self._game_state(game_id)['history']
+            windows += [history.drop(columns=['scoring_prob', 'conceding_prob'], errors='ignore'), actions]
+            is_new += [np.zeros(len(history), dtype=bool), np.ones(len(actions), dtype=bool)]
+
+        window = pd.concat(windows, ignore_index=True)
+        X = compute_game_features(window, nb_prev_actions=NB_PREV_ACTIONS)[np.concatenate(is_new)]
+
+        features, scores, start = [], [], 0
+        for game_id, actions, _, _ in batch:
+            X_request = X.iloc[start:start + len(actions)].copy()
+            scores.append(self._update_goalscore(self._game_state(game_id), actions, X_request))
+            features.append(X_request)
+            start += len(actions)
+
+        return features, scores
+
+    def _values(self, game_id, actions, scoring_probs, conceding_probs):
+        """
+        Aplica a fórmula do VAEP às novas ações, usando a última ação do
+        histórico como ação anterior.
+
+        Returns:
+            tuple: (valores VAEP, novo histórico do jogo)
+        """
+        history = self._game_state(game_id)['history']
+
+        actions = actions.assign(scoring_prob=scoring_probs, conceding_prob=conceding_probs)
+        window = pd.concat([history.tail(1), actions], ignore_index=True)
+
+        values = vaep_formula(
+            window,
+            window['scoring_prob'].to_numpy(dtype=float),
+            window['conceding_prob'].to_numpy(dtype=float),
+        ).iloc[len(window) - len(actions):]
+
+        return values, pd.concat([history, actions], ignore_index=True).tail(NB_PREV_ACTIONS)
+
+    def _run_batch(self, batch):
+        """
+        Processa um micro-lote: features de todas as requisições, uma predição
+        por modelo para o lote inteiro e os valores VAEP de cada requisição.
+        O estado dos jogos só muda no fim: se algo falhar, nenhum jogo do lote
+        fica com o estado pela metade.
+        """
+        features, scores = self._features(batch)
+        X = pd.concat(features)
+
+        scoring_probs = self._predict_score(X)
+        conceding_probs = self._predict_concede(X)
+
+        results, histories, start = [], [], 0
+        for (game_id, actions, _, _), X_request in zip(batch, features):
+            end = start + len(X_request)
+            values, history = self._values(game_id, actions, scoring_probs[start:end], conceding_probs[start:end])
+            results.append(values)
+            histories.append(history)
+            start = end
+
+        for (game_id, _, _, _), (goals, owngoals), history in zip(batch, scores, histories):
+            self.games[game_id] = {'history': history, 'goals': goals, 'owngoals': owngoals}
+
+        return results
+
+    async def batcher(self):
+        """
+        Junta requisições concorrentes em micro-lotes. Um jogo aparece no
+        máximo uma vez por lote, pois cada requisição depende do estado
+        deixado pela anterior do mesmo jogo.
+        """
+        loop = asyncio.get_running_loop()
+        pending = deque()
+        while True:
+            if not pending:
+                pending.append(await self.queue.get())
+
+            deadline = time.perf_counter() + self.max_wait
+            while len(pending) < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            batch, deferred, games = [], deque(), set()
+            for item in pending:
+                if item[0] in games or len(batch) >= self.max_batch_size:
+                    deferred.append(item)
+                else:
+                    games.add(item[0])
+                    batch.append(item)
+            pending = deferred
+
+            # O cálculo roda em uma thread para o loop continuar recebendo
+            # requisições (que formam o próximo lote) enquanto isso
+            try:
+                results = await loop.run_in_executor(None, self._run_batch, batch)
+            except Exception as e:
+                for _, _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            finished_at = time.perf_counter()
+            for (_, _, future, received_at), values in zip(batch, results):
+                if not future.done():
+                    future.set_result(values)
+                self.latencies.append(finished_at - received_at)
+            self.batch_sizes.append(len(batch))
+
+    async def score(self, game_id, actions):
+        """
+        Enfileira as ações de um jogo e espera os valores VAEP
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((game_id, actions, future, time.perf_counter()))
+        return await future
+
+    def metrics(self):
+        latencies = np.array(self.latencies) * 1000
+        return {
+            'requests': len(latencies),
+            'latency_p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else None,
+            'latency_p99_ms': float(np.percentile(latencies, 99)) if len(latencies) else None,
+            'mean_batch_size': float(np.mean(self.batch_sizes)) if self.batch_sizes else None,
+            'games': len(self.games),
+        }
+
+
+def create_app(service: VAEPScoringService) -> web.Application:
+    """
+    Cria a aplicação aiohttp com as rotas do serviço
+    """
+    async def post_actions(request):
+        game_id = int(request.match_info['game_id'])
+        payload = await request.json()
+
+        actions = pd.DataFrame(payload if isinstance(payload, list) else [payload])
+        actions['game_id'] = game_id
+
+        values = await service.score(game_id, actions)
+
+        return web.json_response({
+            'game_id': game_id,
+            'values': values.to_dict(orient='records'),
+        })
+
+    async def delete_game(request):
+        service.reset_game(int(request.match_info['game_id']))
+        return web.json_response({'ok': True})
+
+    async def get_metrics(request):
+        return web.json_response(service.metrics())
+
+    async def start_batcher(app):
+        service.queue = asyncio.Queue()
+        app['batcher'] = asyncio.create_task(service.batcher())
+
+    async def stop_batcher(app):
+        app['batcher'].cancel()
+
+    app = web.Application()
+    app.add_routes([
+        web.post('/games/{game_id}/actions', post_actions),
+        web.delete('/games/{game_id}', delete_game),
+        web.get('/metrics', get_metrics),
+    ])
+    app.on_startup.append(start_batcher)
+    app.on_cleanup.append(stop_batcher)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço local de valoração VAEP")
+    parser.add_argument("--version", default="latest", help="Versão ou tag do registry de modelos")
+    parser.add_argument("--registry", default="./models/", help="Diretório do registry de modelos")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix-socket", default=None, help="Escuta em um Unix socket em vez de TCP")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    models = load_models(args.version, registry_path=args.registry)
+    service = VAEPScoringService(models, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    app = create_app(service)
+
+    if args.unix_socket:
+        web.run_app(app, path=args.unix_socket)
+    else:
+        web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,17 @@
 
-import datetime
 import os
-import pickle
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from socceraction.vaep import VAEP
-import joblib
+import pyarrow as pa
+import pyarrow.parquet as pq
 from tqdm import tqdm
 
-import socceraction.vaep as vaep
-import socceraction.vaep.features as fs
 import socceraction.vaep.labels as lab
 
+from .feature_store import get_features, get_game_features
+from .player_stats import load_seasons, update_player_stats
+from .registry import load_models, register_models
+
 def prepare_vaep_data(actions):
     """
     Prepara os dados para treinamento do VAEP
@@ -23,30 +22,9 @@ def prepare_vaep_data(actions):
     Returns:
         tuple: (gamestates, labels_scores, labels_concedes)
     """
-    home_team_id = actions.iloc[0]["home_team_id"]
-
     print("Preparando dados para VAEP...")
-    print("Convertendo ações para game states...")
-    gamestates = fs.gamestates(actions, nb_prev_actions=3)
-    gamestates = fs.play_left_to_right(gamestates, home_team_id)
-    print(f"Game states criados: {len(gamestates)}")
-    
-    print("Extraindo features dos game states...")
-    xfns = [
-        fs.actiontype_onehot,
-        fs.bodypart_onehot,
-        fs.result_onehot,
-        fs.goalscore,
-        fs.startlocation,
-        fs.endlocation,
-        fs.movement,
-        fs.space_delta,
-        fs.startpolar,
-        fs.endpolar,
-        fs.team,
-        fs.time_delta
-    ]
-    X = pd.concat([fn(gamestates) for fn in xfns], axis=1)
+    print("Extraindo features dos game states (feature store)...")
+    X = get_features(actions)
     print(f"Features extraídas: {X.shape}")
     
     print("Criando labels...")
@@ -90,7 +68,7 @@ def prepare_vaep_data(actions):
 
 
 
-def train_vaep_model(X, Y, test_size=0.2, random_state=42):
+def train_vaep_model(X, Y, test_size=0.2, random_state=42, mode="sequential", n_jobs=-1):
     """
     Treina o modelo VAEP
     
@@ -99,12 +77,13 @@ def train_vaep_model(X, Y, test_size=0.2, random_state=42):
         Y (pd.DataFrame): Labels com colunas 'scores' e 'concedes'
         test_size (float): Proporção dos dados para teste
         random_state (int): Seed para reprodutibilidade
+        mode (str): "sequential", "parallel" ou "multioutput" (ver fit_vaep_heads)
+        n_jobs (int): Número total de núcleos usados no treino
     
     Returns:
         tuple: (model_score, model_concede) Modelos treinados
     """
     from sklearn.model_selection import train_test_split
-    from sklearn.ensemble import RandomForestClassifier
     from sklearn.metrics import roc_auc_score, classification_report
     
     print("Dividindo dados em treino e teste...")
@@ -124,28 +103,12 @@ def train_vaep_model(X, Y, test_size=0.2, random_state=42):
     print(f"Dados de treino: {len(X_train)}")
     print(f"Dados de teste: {len(X_test)}")
     
-    # Criar e treinar modelos separados para scoring e conceding
+    # Criar e treinar modelos para scoring e conceding
     print("Iniciando treinamento dos modelos...")
-    
-    # Modelo para scoring
-    print("Treinando classificador para scoring...")
-    model_score = RandomForestClassifier(
-        n_estimators=100,
-        max_depth=10,
-        random_state=random_state,
-        n_jobs=-1
-    )
-    model_score.fit(X_train, y_score_train)
-    
-    # Modelo para conceding
-    print("Treinando classificador para conceding...")
-    model_concede = RandomForestClassifier(
-        n_estimators=100,
-        max_depth=10,
-        random_state=random_state,
-        n_jobs=-1
+    model_score, model_concede = fit_vaep_heads(
+        X_train, y_score_train, y_concede_train,
+        mode=mode, random_state=random_state, n_jobs=n_jobs
     )
-    model_concede.fit(X_train, y_concede_train)
     
     print("Modelos treinados com sucesso!")
     
@@ -177,107 +140,412 @@ def train_vaep_model(X, Y, test_size=0.2, random_state=42):
     
     return model_score, model_concede
 
-def save_model(models, model_path="models/"):
+# Parâmetros do gradient boosting por histogramas treinado em lotes
+VAEP_XGB_PARAMS = {
+    'objective': 'binary:logistic',
+    'tree_method': 'hist',
+    'multi_strategy': 'one_output_per_tree',
+    'max_depth': 6,
+    'eta': 0.1,
+    'max_bin': 256,
+    'eval_metric': 'logloss',
+}
+
+
+class MultiOutputHead:
     """
-    Salva os modelos treinados
+    Uma das saídas (scoring ou conceding) de um modelo multi-output, com a
+    mesma interface de um classificador binário do sklearn.
+    """
+
+    def __init__(self, model, output):
+        self.model = model
+        self.output = output
+
+    @property
+    def feature_names_in_(self):
+        return self.model.feature_names_in_
+
+    @property
+    def classes_(self):
+        return self.model.classes_[self.output]
+
+    def predict_proba(self, X):
+        return self.model.predict_proba(X)[self.output]
+
+    def predict(self, X):
+        return self.model.predict(X)[:, self.output]
+
+
+class XGBoostHead:
+    """
+    Uma das saídas de um Booster multi-label do XGBoost, com a mesma
+    interface de um classificador binário do sklearn.
+    """
+
+    classes_ = np.array([0, 1])
+
+    def __init__(self, booster, output):
+        self.booster = booster
+        self.output = output
+        self.feature_names_in_ = np.array(booster.feature_names, dtype=object)
+
+    def predict_proba(self, X):
+        if isinstance(X, pd.DataFrame):
+            X = X[list(self.feature_names_in_)]
+        p = self.booster.inplace_predict(X)[:, self.output]
+        return np.column_stack([1 - p, p])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] >= 0.5).astype(int)
+
+
+def fit_vaep_heads(X, y_score, y_concede, mode="sequential", random_state=42, n_jobs=-1):
+    """
+    Treina os classificadores de scoring e conceding
+    
+    Modos:
+        "sequential": um modelo depois do outro, cada um com todos os núcleos
+        "parallel": os dois modelos ao mesmo tempo, cada um com metade dos núcleos
+        "multioutput": uma única floresta com as duas saídas
     
     Args:
-        models: Tupla com (model_score, model_concede)
-        model_path (str): Caminho para salvar o modelo
+        X (pd.DataFrame): Features de treino
+        y_score (pd.Series): Labels de scoring
+        y_concede (pd.Series): Labels de conceding
+        mode (str): Modo de treino
+        random_state (int): Seed para reprodutibilidade
+        n_jobs (int): Número total de núcleos (-1 para todos)
+    
+    Returns:
+        tuple: (model_score, model_concede)
+    """
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+    
+    params = {'n_estimators': 100, 'max_depth': 10, 'random_state': random_state}
+    
+    if mode == "sequential":
+        print("Treinando classificador para scoring...")
+        model_score = RandomForestClassifier(**params, n_jobs=n_jobs).fit(X, y_score)
+        print("Treinando classificador para conceding...")
+        model_concede = RandomForestClassifier(**params, n_jobs=n_jobs).fit(X, y_concede)
+        return model_score, model_concede
+    
+    if mode == "parallel":
+        n_cores = joblib.cpu_count() + 1 + n_jobs if n_jobs < 0 else n_jobs
+        n_jobs_head = max(1, n_cores // 2)
+        print(f"Treinando scoring e conceding em paralelo ({n_jobs_head} núcleos cada)...")
+        
+        models = [RandomForestClassifier(**params, n_jobs=n_jobs_head) for _ in range(2)]
+        # A construção das árvores libera o GIL, então threads bastam e X é compartilhado
+        joblib.Parallel(n_jobs=2, prefer="threads")(
+            joblib.delayed(model.fit)(X, y) for model, y in zip(models, [y_score, y_concede])
+        )
+        for model in models:
+            model.n_jobs = n_jobs
+        return tuple(models)
+    
+    if mode == "multioutput":
+        print("Treinando classificador multi-output (scoring e conceding)...")
+        model = RandomForestClassifier(**params, n_jobs=n_jobs)
+        model.fit(X, np.column_stack([y_score, y_concede]))
+        return MultiOutputHead(model, 0), MultiOutputHead(model, 1)
+    
+    raise ValueError(f"Modo de treino desconhecido: {mode}")
+
+
+def _game_batch_xy(games):
+    """
+    Features (do feature store) e labels de um lote de jogos, sem as linhas
+    com labels NA
+    """
+    X = pd.concat([get_game_features(game_actions) for game_actions in games])
+    Y = pd.concat([
+        pd.concat([lab.scores(game_actions), lab.concedes(game_actions)], axis=1)
+        for game_actions in games
+    ])
+    valid = ~Y.isna().any(axis=1)
+    
+    return X[valid], Y[valid].astype(int)
+
+
+def _feature_store_iter(actions, game_ids, batch_size=50, cache_prefix=None):
+    """
+    Iterador do XGBoost que entrega as features e labels lote a lote de
+    jogos, para construir a matriz de treino sem carregar tudo em memória.
+    A classe é criada aqui para o xgboost só ser importado no treino.
+    """
+    import xgboost as xgb
+
+    class FeatureStoreIter(xgb.DataIter):
+
+        def __init__(self):
+            self._batches = None
+            super().__init__(cache_prefix=cache_prefix)
+
+        def reset(self):
+            self._batches = None
+
+        def next(self, input_data):
+            if self._batches is None:
+                self._batches = iter_game_batches(actions, batch_size, game_ids)
+            
+            games = next(self._batches, None)
+            if games is None:
+                return False
+            
+            X, Y = _game_batch_xy(games)
+            input_data(data=X, label=Y.to_numpy(dtype=np.float32))
+            return True
+
+    return FeatureStoreIter()
+
+
+def train_vaep_model_chunked(actions, test_size=0.2, batch_size=50, params=None, num_boost_round=500,
+                             early_stopping_rounds=20, external_memory=False,
+                             cache_prefix="./data/xgb_cache/", random_state=42):
     """
-    os.makedirs(model_path, exist_ok=True)
+    Treina o VAEP com gradient boosting por histogramas (XGBoost) a partir de
+    lotes de jogos do feature store, sem montar a matriz X inteira em memória.
     
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    A matriz de treino guarda só os índices dos bins de cada feature (ou fica
+    em disco com external_memory=True), e um único modelo multi-label aprende
+    scoring e conceding ao mesmo tempo.
     
-    model_score, model_concede = models
+    Args:
+        actions: DataFrame com dados SPADL ou caminho de um parquet SPADL
+        test_size (float): Proporção dos jogos usados para teste
+        batch_size (int): Número de jogos por lote
+        params (dict): Parâmetros do XGBoost (sobrescrevem VAEP_XGB_PARAMS)
+        num_boost_round (int): Número máximo de rodadas de boosting
+        early_stopping_rounds (int): Rodadas sem melhora no teste antes de parar
+        external_memory (bool): Mantém a matriz de treino em disco
+        cache_prefix (str): Diretório do cache de external memory
+        random_state (int): Seed da divisão de jogos em treino e teste
     
-    # Salvar modelo de scoring
-    score_filename = f"vaep_scoring_model_{timestamp}.pkl"
-    score_filepath = os.path.join(model_path, score_filename)
-    with open(score_filepath, 'wb') as f:
-        pickle.dump(model_score, f)
+    Returns:
+        tuple: (model_score, model_concede) como XGBoostHead
+    """
+    import xgboost as xgb
+    from sklearn.metrics import roc_auc_score
+    
+    print("Treinando VAEP com gradient boosting em lotes do feature store...")
+    
+    if isinstance(actions, pd.DataFrame):
+        game_ids = actions['game_id'].unique()
+    else:
+        game_ids = pd.read_parquet(actions, columns=['game_id'])['game_id'].unique()
+    
+    # Divisão por jogo, para não misturar ações do mesmo jogo em treino e teste
+    game_ids = np.random.default_rng(random_state).permutation(game_ids)
+    n_test = int(round(len(game_ids) * test_size))
+    test_ids, train_ids = game_ids[:n_test].tolist(), game_ids[n_test:].tolist()
+    print(f"Jogos de treino: {len(train_ids)}")
+    print(f"Jogos de teste: {len(test_ids)}")
+    
+    if external_memory:
+        os.makedirs(cache_prefix, exist_ok=True)
+        train_iter = _feature_store_iter(actions, train_ids, batch_size, cache_prefix=cache_prefix)
+        dtrain = xgb.ExtMemQuantileDMatrix(train_iter)
+    else:
+        train_iter = _feature_store_iter(actions, train_ids, batch_size)
+        dtrain = xgb.QuantileDMatrix(train_iter)
+    
+    evals = [(dtrain, 'train')]
+    dtest = None
+    if test_ids:
+        dtest = xgb.QuantileDMatrix(_feature_store_iter(actions, test_ids, batch_size), ref=dtrain)
+        evals.append((dtest, 'test'))
+    
+    booster = xgb.train(
+        {**VAEP_XGB_PARAMS, **(params or {})},
+        dtrain,
+        num_boost_round=num_boost_round,
+        evals=evals,
+        early_stopping_rounds=early_stopping_rounds if dtest is not None else None,
+        verbose_eval=50,
+    )
     
-    # Salvar modelo de conceding
-    concede_filename = f"vaep_conceding_model_{timestamp}.pkl"
-    concede_filepath = os.path.join(model_path, concede_filename)
-    with open(concede_filepath, 'wb') as f:
-        pickle.dump(model_concede, f)
+    if dtest is not None:
+        booster = booster[:booster.best_iteration + 1]
+        
+        print("Avaliando modelos...")
+        predictions = booster.predict(dtest)
+        labels = dtest.get_label().reshape(predictions.shape)
+        for output, name in enumerate(["Scoring", "Conceding"]):
+            try:
+                auc = roc_auc_score(labels[:, output], predictions[:, output])
+                print(f"AUC Score ({name}): {auc:.4f}")
+            except ValueError as e:
+                print(f"Não foi possível calcular AUC para {name.lower()}: {e}")
     
-    print(f"Modelo de scoring salvo em: {score_filepath}")
-    print(f"Modelo de conceding salvo em: {concede_filepath}")
+    print("Modelos treinados com sucesso!")
     
-    return score_filepath, concede_filepath
+    return XGBoostHead(booster, 0), XGBoostHead(booster, 1)
 
-def calculate_vaep_values(models, actions):
+def save_model(models, model_path="models/", X=None, metrics=None, tag=None):
+    """
+    Salva os modelos treinados como uma nova versão do registry de modelos
+    
+    Args:
+        models: Tupla com (model_score, model_concede)
+        model_path (str): Caminho do registry
+        X (pd.DataFrame): Features de treino (para o hash nos metadados)
+        metrics (dict): Métricas de avaliação dos modelos
+        tag (str): Tag opcional para a versão (ex: "producao")
+    
+    Returns:
+        tuple: Caminhos dos arquivos dos modelos de scoring e conceding
+    """
+    version = register_models(models, X=X, metrics=metrics, tag=tag, registry_path=model_path)
+    
+    model_score, model_concede = load_models(version, registry_path=model_path)
+    
+    print(f"Modelo de scoring salvo em: {model_score.path}")
+    print(f"Modelo de conceding salvo em: {model_concede.path}")
+    
+    return model_score.path, model_concede.path
+
+# Colunas de identificação gravadas junto com os valores no modo streaming
+VAEP_ID_COLUMNS = [
+    'game_id', 'original_event_id', 'action_id', 'period_id', 'time_seconds',
+    'team_id', 'player_id', 'type_name', 'result_name'
+]
+
+VAEP_VALUE_COLUMNS = ['vaep_value', 'offensive_value', 'defensive_value', 'scoring_prob', 'conceding_prob']
+
+# Tipos de ação usados pela fórmula do VAEP (nomes do socceraction e do convert_to_spadl)
+_SHOT_TYPES = ['shot', 'shot_freekick', 'shot_penalty']
+_CORNER_TYPES = ['corner', 'corner_crossed', 'corner_short']
+_SAMEPHASE_SECONDS = 10
+
+
+def vaep_formula(actions, scoring_probs, conceding_probs):
+    """
+    Fórmula do VAEP (socceraction.vaep.formula) vetorizada para um lote de
+    jogos. A ação anterior vem de um shift sobre o lote, e na primeira ação de
+    cada jogo a ação anterior é ela mesma, para não misturar jogos diferentes.
+
+    Args:
+        actions (pd.DataFrame): Ações SPADL com cada jogo em linhas contíguas
+        scoring_probs (np.ndarray): P(marcar) de cada game state
+        conceding_probs (np.ndarray): P(sofrer) de cada game state
+
+    Returns:
+        pd.DataFrame: Colunas de VAEP_VALUE_COLUMNS com o índice de actions
+    """
+    game_id = actions['game_id'].to_numpy()
+    first_in_game = np.ones(len(actions), dtype=bool)
+    first_in_game[1:] = game_id[1:] != game_id[:-1]
+
+    def prev(x):
+        prev_x = np.roll(x, 1)
+        prev_x[first_in_game] = x[first_in_game]
+        return prev_x
+
+    team_id = actions['team_id'].to_numpy(dtype=float, na_value=np.nan)
+    time_seconds = actions['time_seconds'].to_numpy(dtype=float, na_value=np.nan)
+    type_name = actions['type_name'].to_numpy()
+    result_name = actions['result_name'].to_numpy()
+
+    sameteam = prev(team_id) == team_id
+    prev_scores = np.where(sameteam, prev(scoring_probs), prev(conceding_probs))
+    prev_concedes = np.where(sameteam, prev(conceding_probs), prev(scoring_probs))
+
+    # Se a ação anterior foi há muito tempo ou foi um gol, as chances zeram
+    toolong = np.abs(time_seconds - prev(time_seconds)) > _SAMEPHASE_SECONDS
+    prevgoal = np.isin(prev(type_name), _SHOT_TYPES) & (prev(result_name) == 'success')
+    prev_scores[toolong | prevgoal] = 0.0
+    prev_concedes[toolong | prevgoal] = 0.0
+
+    # Chances fixas de marcar em pênaltis e escanteios
+    prev_scores[type_name == 'shot_penalty'] = 0.792453
+    prev_scores[np.isin(type_name, _CORNER_TYPES)] = 0.046500
+
+    offensive_values = scoring_probs - prev_scores
+    defensive_values = -(conceding_probs - prev_concedes)
+
+    return pd.DataFrame({
+        'vaep_value': offensive_values + defensive_values,
+        'offensive_value': offensive_values,
+        'defensive_value': defensive_values,
+        'scoring_prob': scoring_probs,
+        'conceding_prob': conceding_probs,
+    }, index=actions.index)
+
+
+def iter_game_batches(actions, batch_size=50, game_ids=None):
+    """
+    Percorre as ações em lotes de jogos, um DataFrame por jogo.
+
+    Args:
+        actions: DataFrame com dados SPADL ou caminho de um parquet SPADL. No
+            caso do parquet, apenas os jogos do lote são lidos do disco.
+        batch_size (int): Número de jogos por lote
+        game_ids (list): Jogos a percorrer (todos se None)
+
+    Yields:
+        list: Lista de DataFrames, um por jogo
+    """
+    if isinstance(actions, pd.DataFrame):
+        if game_ids is not None:
+            actions = actions[actions['game_id'].isin(game_ids)]
+        games = [game_actions for _, game_actions in actions.groupby('game_id', sort=False)]
+        for i in range(0, len(games), batch_size):
+            yield games[i:i + batch_size]
+        return
+
+    if game_ids is None:
+        game_ids = pd.read_parquet(actions, columns=['game_id'])['game_id'].unique().tolist()
+    for i in range(0, len(game_ids), batch_size):
+        batch = pd.read_parquet(actions, filters=[('game_id', 'in', game_ids[i:i + batch_size])])
+        yield [game_actions for _, game_actions in batch.groupby('game_id', sort=False)]
+
+
+def value_game_batch(models, games):
+    """
+    Calcula os valores VAEP de um lote de jogos com uma única chamada de
+    predict_proba por modelo.
+
+    Args:
+        models: Tupla com (model_score, model_concede)
+        games (list): Lista de DataFrames SPADL, um por jogo
+
+    Returns:
+        tuple: (ações do lote, DataFrame com VAEP_VALUE_COLUMNS)
+    """
+    model_score, model_concede = models
+
+    batch = pd.concat(games)
+    X = pd.concat([get_game_features(game_actions) for game_actions in games])
+
+    scoring_probs = model_score.predict_proba(X)[:, 1]
+    conceding_probs = model_concede.predict_proba(X)[:, 1]
+
+    return batch, vaep_formula(batch, scoring_probs, conceding_probs)
+
+
+def calculate_vaep_values(models, actions, batch_size=50):
     """
     Calcula valores VAEP para as ações
     
     Args:
         models: Tupla com (model_score, model_concede)
         actions (pd.DataFrame): DataFrame com dados SPADL
+        batch_size (int): Número de jogos por lote de predição
     
     Returns:
         pd.DataFrame: DataFrame com valores VAEP adicionados
     """
     print("Calculando valores VAEP...")
     
-    model_score, model_concede = models
-    home_team_id = actions.iloc[0]["home_team_id"]
-    
-    # Converter para game states
-    gamestates = fs.gamestates(actions, nb_prev_actions=3)
-    gamestates = fs.play_left_to_right(gamestates, home_team_id)
-    
-    # Extrair features
-
-    xfns = [
-        fs.actiontype_onehot,
-        fs.bodypart_onehot,
-        fs.result_onehot,
-        fs.goalscore,
-        fs.startlocation,
-        fs.endlocation,
-        fs.movement,
-        fs.space_delta,
-        fs.startpolar,
-        fs.endpolar,
-        fs.team,
-        fs.time_delta
-    ]
-    X = pd.concat([fn(gamestates) for fn in xfns], axis=1)
-    
-    # Prever probabilidades
-    scoring_probs = model_score.predict_proba(X)[:, 1]  # Probabilidade da classe positiva
-    conceding_probs = model_concede.predict_proba(X)[:, 1]  # Probabilidade da classe positiva
-    
-    # Calcular valores VAEP usando a fórmula básica
-    # Valor ofensivo = diferença na probabilidade de marcar
-    # Valor defensivo = diferença na probabilidade de sofrer (invertido)
-    offensive_values = scoring_probs
-    defensive_values = -conceding_probs  # Negativo porque menos probabilidade de sofrer é melhor
-    vaep_values = offensive_values + defensive_values
-    
-    # Adicionar valores ao DataFrame original
-    actions_with_vaep = actions.copy()
-    
-    # Alinhar com as ações originais (gamestates pode ter menos linhas)
-    min_length = min(len(actions), len(vaep_values))
-    
-    # Inicializar com NaN
-    actions_with_vaep['vaep_value'] = np.nan
-    actions_with_vaep['offensive_value'] = np.nan
-    actions_with_vaep['defensive_value'] = np.nan
-    actions_with_vaep['scoring_prob'] = np.nan
-    actions_with_vaep['conceding_prob'] = np.nan
-    
-    # Preencher valores onde possível
-    if len(vaep_values) <= len(actions):
-        start_idx = len(actions) - len(vaep_values)
-        actions_with_vaep.iloc[start_idx:, actions_with_vaep.columns.get_loc('vaep_value')] = vaep_values
-        actions_with_vaep.iloc[start_idx:, actions_with_vaep.columns.get_loc('offensive_value')] = offensive_values
-        actions_with_vaep.iloc[start_idx:, actions_with_vaep.columns.get_loc('defensive_value')] = defensive_values
-        actions_with_vaep.iloc[start_idx:, actions_with_vaep.columns.get_loc('scoring_prob')] = scoring_probs
-        actions_with_vaep.iloc[start_idx:, actions_with_vaep.columns.get_loc('conceding_prob')] = conceding_probs
+    values = pd.concat([
+        value_game_batch(models, games)[1]
+        for games in iter_game_batches(actions, batch_size)
+    ])
+    
+    actions_with_vaep = pd.concat([actions, values.reindex(actions.index)], axis=1)
     
     valid_values = actions_with_vaep['vaep_value'].notna()
     print(f"Valores VAEP calculados para {valid_values.sum()} de {len(actions_with_vaep)} ações")
@@ -289,6 +557,61 @@ def calculate_vaep_values(models, actions):
     
     return actions_with_vaep
 
+def stream_vaep_values(models, actions, output_path, batch_size=50, columns=VAEP_ID_COLUMNS, player_stats_path=None,
+                       seasons=None):
+    """
+    Calcula valores VAEP jogo a jogo e grava cada lote direto em um parquet,
+    sem manter todas as ações ou todos os valores em memória.
+    
+    Args:
+        models: Tupla com (model_score, model_concede)
+        actions: DataFrame com dados SPADL ou caminho de um parquet SPADL
+        output_path (str): Caminho do parquet de saída
+        batch_size (int): Número de jogos por lote (limita o uso de memória)
+        columns (list): Colunas das ações gravadas junto com os valores
+        player_stats_path (str): Store de estatísticas por jogador atualizado
+            a cada lote (ver player_stats.update_player_stats)
+        seasons (dict): game_id -> temporada para o store (lida do
+            metadata.csv com load_seasons se None)
+    
+    Returns:
+        str: Caminho do parquet gravado
+    """
+    print("Calculando valores VAEP em streaming...")
+    
+    writer = None
+    n_actions = 0
+    
+    if player_stats_path is not None and seasons is None:
+        seasons = load_seasons()
+    
+    try:
+        for games in tqdm(iter_game_batches(actions, batch_size), desc="Lotes"):
+            batch, values = value_game_batch(models, games)
+            
+            out = pd.concat([batch[[col for col in columns if col in batch.columns]], values], axis=1)
+            table = pa.Table.from_pandas(out, preserve_index=False)
+            
+            if writer is None:
+                os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+                writer = pq.ParquetWriter(output_path, table.schema)
+            else:
+                table = table.cast(writer.schema)
+            
+            writer.write_table(table)
+            n_actions += len(out)
+            
+            if player_stats_path is not None:
+                update_player_stats(pd.concat([batch, values], axis=1), player_stats_path, seasons)
+    finally:
+        # Fecha o arquivo mesmo se um lote falhar, para o parquet não ficar truncado
+        if writer is not None:
+            writer.close()
+    
+    print(f"Valores VAEP de {n_actions} ações salvos em: {output_path}")
+    
+    return output_path
+
 # spadl_df = pd.read_parquet('./data/events_spadl.parquet')
 # X, Y  = prepare_vaep_data(spadl_df)
 # models = train_vaep_model(X, Y)